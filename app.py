@@ -1,11 +1,9 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go 
-from plotly.subplots import make_subplots
-import requests
-import time
 import urllib3
+import threading
 import competitor_analysis as ca
 import chips_analysis as chips # 👈 新增這一行
 import report_generator as rg # 👈 新增這個
@@ -13,7 +11,12 @@ import report_generator as rg # 👈 新增這個
 import company_info as ci
 import financial_data as fd
 import news_analyzer as news # 確保已匯入
+import price_store as ps
+import chart_builder as cb
 import chips_analysis as chips
+from load_orchestrator import LoadOrchestrator
+import cache_utils
+import telemetry
 # 忽略 SSL 警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -23,55 +26,52 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 st.set_page_config(page_title="超級財報狗 (新聞雷達版)", layout="wide")
 st.title("🐶 超級財報狗 Pro+ : 深度個股分析")
 
-# ... (中間的 fetch_stock_history, 股票搜尋, 基本資料, 股價圖, 財報分析 都不用動) ...
-# ... (為了節省篇幅，請保留您原本中間這一段程式碼) ...
+# 核心模組不依賴 Streamlit；在網頁上改用 st.cache_data 當快取
+cache_utils.set_backend(cache_utils.streamlit_cache) # 固定的函式，rerun 時不會重建快取
 
-# 這裡我把 fetch_stock_history 補上以免您複製貼上時漏掉
-@st.cache_data(ttl=3600)
-def fetch_stock_history(stock_code):
-    all_data = []
-    date_list = pd.date_range(end=pd.Timestamp.now(), periods=6, freq='MS')
-    for date_item in date_list:
-        date_str = date_item.strftime("%Y%m%d")
-        url = f"https://www.twse.com.tw/exchangeReport/STOCK_DAY?response=json&date={date_str}&stockNo={stock_code}"
-        try:
-            res = requests.get(url, verify=False)
-            data = res.json()
-            if data['stat'] == 'OK':
-                df = pd.DataFrame(data['data'], columns=data['fields'])
-                df['日期'] = df['日期'].apply(lambda x: str(int(x.split('/')[0]) + 1911) + '-' + x.split('/')[1] + '-' + x.split('/')[2])
-                for col in ['收盤價', '開盤價', '最高價', '最低價', '成交股數']:
-                    if col in df.columns: df[col] = pd.to_numeric(df[col].str.replace(',', ''), errors='coerce')
-                all_data.append(df)
-            time.sleep(0.5)
-        except: pass
-    return pd.concat(all_data, ignore_index=True) if all_data else None
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
 
-# ==========================================
+# 效能追蹤依使用者分開記錄 (背景執行緒也掛了同一個 context，所以算在同一個人身上)
+telemetry.set_session_resolver(current_session_id)
 
 # ==========================================
-# 2. 股價爬蟲 (這個比較單純，暫時留在主程式)
+# 2. 股價歷史 (本機股價庫：已結束的月份不再重抓，只補本月)
 # ==========================================
+HISTORY_MONTHS = 6 # 一開始載入的月數；圖表選更長的範圍時才再補
+
+@st.cache_data(ttl=3600)
+def fetch_stock_history(stock_code, months=HISTORY_MONTHS):
+    # 抓取最近 N 個月 (預設 6 個月)
+    return ps.get_history(stock_code, months=months)
+
+# 其他資料也加上快取：Streamlit 每次互動都會重跑整頁，沒快取就會整頁重抓
+@st.cache_data(ttl=3600)
+def prepare_chart_frame(df_price):
+    # 圖表用的資料 (均線、顏色) 只算一次，切換範圍時直接重用
+    return cb.prepare_price_frame(df_price)
+
+@st.cache_data(ttl=3600)
+def load_company_info(stock_code):
+    return ci.get_company_basic_info(stock_code)
+
 @st.cache_data(ttl=3600)
-def fetch_stock_history(stock_code):
-    all_data = []
-    # 抓取最近 6 個月
-    date_list = pd.date_range(end=pd.Timestamp.now(), periods=6, freq='MS')
-    for date_item in date_list:
-        date_str = date_item.strftime("%Y%m%d")
-        url = f"https://www.twse.com.tw/exchangeReport/STOCK_DAY?response=json&date={date_str}&stockNo={stock_code}"
-        try:
-            res = requests.get(url, verify=False)
-            data = res.json()
-            if data['stat'] == 'OK':
-                df = pd.DataFrame(data['data'], columns=data['fields'])
-                df['日期'] = df['日期'].apply(lambda x: str(int(x.split('/')[0]) + 1911) + '-' + x.split('/')[1] + '-' + x.split('/')[2])
-                for col in ['收盤價', '開盤價', '最高價', '最低價', '成交股數']:
-                    if col in df.columns: df[col] = pd.to_numeric(df[col].str.replace(',', ''), errors='coerce')
-                all_data.append(df)
-            time.sleep(0.5)
-        except: pass
-    return pd.concat(all_data, ignore_index=True) if all_data else None
+def load_financials(stock_code, refresh=False):
+    return fd.get_comprehensive_analysis(stock_code, refresh=refresh)
+
+@st.cache_data(ttl=1800)
+def load_chips(stock_code):
+    return chips.get_chips_data(stock_code, days=10) # 抓最近 10 天
+
+@st.cache_data(ttl=900)
+def load_news(target_name):
+    # 多空兩個查詢同時搜尋；RSS 本身另有網址快取與條件式請求 (news_analyzer)
+    return news.search_news_all(target_name)
+
+@st.cache_data(ttl=3600)
+def load_peers(stock_code, industry):
+    return ca.get_peers_comparison(stock_code, industry)
 
 # ==========================================
 # 3. 主介面邏輯
@@ -79,6 +79,8 @@ def fetch_stock_history(stock_code):
 with st.sidebar:
     st.header("🔍 股票搜尋")
     stock_id = st.text_input("輸入股票代號", value="2330")
+    # 財報存在本機快取 (30 天)，需要最新數字時再手動重抓
+    refresh_fin = st.button("🔄 重新抓取財報")
     st.markdown("---")
     st.markdown("### 📥 輸出報告")
     
@@ -87,20 +89,14 @@ with st.sidebar:
     # 但 Streamlit 的 Sidebar 可以在任何地方定義。
     # 為了簡單起見，我們把按鈕放在「主程式邏輯」的最後面，但顯示位置設在 Sidebar。
     st.caption("模組化版本：基本資料與財報分離")
+    st.markdown("---")
+    show_debug = st.toggle("🐞 效能除錯面板", help="顯示這次連線每個抓取與分析階段花了多少時間")
 
-if stock_id:
-    # 1. 載入資料 (分別呼叫不同模組)
-    with st.spinner('正在挖掘公司資料... 🕵️'):
-        # 呼叫基本資料模組 (company_info)
-        info = ci.get_company_basic_info(stock_id)
-        
-        # 呼叫財報分析模組 (financial_data)
-        df_ratios, insights, score_data = fd.get_comprehensive_analysis(stock_id)
-        
-        # 呼叫股價爬蟲
-        df_price = fetch_stock_history(stock_id)
-
-    # 2. 顯示詳細基本資料
+# ==========================================
+# 4. 各區塊渲染函式 (資料到了才畫)
+# ==========================================
+def render_basic_info(stock_id, info):
+    # 顯示詳細基本資料
     if info and '公司名稱' in info:
         with st.expander(f"🏢 {info['公司名稱']} ({stock_id}) - 詳細基本資料", expanded=True):
             
@@ -140,133 +136,41 @@ if stock_id:
     else:
         st.error(f"找不到 {stock_id} 的基本資料")
 
-    # ... (前面的程式碼不用動) ...
 
-    # 3. 顯示股價圖 (專業 K 線版)
-    if df_price is not None:
-        st.markdown("### 📈 股價走勢 (K線圖)")
-        
-        # 資料整理
-        df_price['日期'] = pd.to_datetime(df_price['日期'])
-        df_plot = df_price.sort_values('日期')
-        
-        # 計算移動平均線 (MA)
-        df_plot['MA5'] = df_plot['收盤價'].rolling(5).mean()
-        df_plot['MA20'] = df_plot['收盤價'].rolling(20).mean()
-
-        # 引入高階繪圖套件
-        import plotly.graph_objects as go
-        from plotly.subplots import make_subplots
-
-        # 建立雙軸圖表 (上面是 K 線，下面是成交量)
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
-                            vertical_spacing=0.05, row_heights=[0.7, 0.3])
-
-        # --- 第一層：K 線圖 ---
-        # 繪製蠟燭圖 (漲紅跌綠)
-        fig.add_trace(go.Candlestick(
-            x=df_plot['日期'],
-            open=df_plot['開盤價'],
-            high=df_plot['最高價'],
-            low=df_plot['最低價'],
-            close=df_plot['收盤價'],
-            name='K線',
-            increasing_line_color='red',  # 台股習慣：漲是紅色
-            decreasing_line_color='green' # 台股習慣：跌是綠色
-        ), row=1, col=1)
-
-        # 繪製 MA5 (黃線)
-        fig.add_trace(go.Scatter(x=df_plot['日期'], y=df_plot['MA5'], 
-                                 mode='lines', name='MA5 (週線)', line=dict(color='orange', width=1)), row=1, col=1)
-        
-        # 繪製 MA20 (藍線)
-        fig.add_trace(go.Scatter(x=df_plot['日期'], y=df_plot['MA20'], 
-                                 mode='lines', name='MA20 (月線)', line=dict(color='blue', width=1)), row=1, col=1)
-
-        # --- 第二層：成交量 ---
-        # 設定顏色：漲紅跌綠
-        colors = ['red' if row['收盤價'] >= row['開盤價'] else 'green' for index, row in df_plot.iterrows()]
-        
-        fig.add_trace(go.Bar(
-            x=df_plot['日期'], 
-            y=df_plot['成交股數'],
-            name='成交量',
-            marker_color=colors
-        ), row=2, col=1)
-
-        # --- 版面設定 ---
-        fig.update_layout(
-            title=f"{stock_id} 股價走勢與成交量",
-            xaxis_rangeslider_visible=False, # 隱藏下方預設的滑桿
-            height=600, # 設定圖表高度
-            showlegend=True,
-            hovermode="x unified" # 滑鼠移過去顯示所有資訊
-        )
-        
-        # 顯示圖表
-        st.plotly_chart(fig, use_container_width=True)
-# ==========================================
-    # 3. 顯示技術面 + 籌碼面 (更新版)
-    # ==========================================
+@st.fragment
+def render_price_chart(stock_id, df_price):
+    # 顯示股價圖 (專業 K 線版) + 可選的三大法人籌碼
+    # 這一區是獨立的 fragment：切換範圍或打開籌碼時只重跑這一區，不會重抓整頁
     if df_price is not None:
         st.markdown("### 📈 技術籌碼分析 (K線 + 成交量 + 三大法人)")
-        
-        # 1. 補抓籌碼資料 (原本沒有這行)
-        with st.spinner('正在分析法人動向...'):
-            df_chips = chips.get_chips_data(stock_id, days=10) # 抓最近 10 天
-        
-        df_price['日期'] = pd.to_datetime(df_price['日期'])
-        df_plot = df_price.sort_values('日期')
-        
-        # 計算均線
-        df_plot['MA5'] = df_plot['收盤價'].rolling(5).mean()
-        df_plot['MA20'] = df_plot['收盤價'].rolling(20).mean()
-
-        # --- 設定 3 層樓圖表 ---
-        fig = make_subplots(
-            rows=3, cols=1, 
-            shared_xaxes=True, 
-            vertical_spacing=0.05, 
-            row_heights=[0.5, 0.25, 0.25], # K線佔一半，剩下給成交量和籌碼
-            subplot_titles=("股價走勢", "成交量", "三大法人買賣超 (近10日)")
-        )
-
-        # (1) K線圖
-        fig.add_trace(go.Candlestick(
-            x=df_plot['日期'],
-            open=df_plot['開盤價'], high=df_plot['最高價'],
-            low=df_plot['最低價'], close=df_plot['收盤價'],
-            name='K線', increasing_line_color='red', decreasing_line_color='green'
-        ), row=1, col=1)
-        
-        fig.add_trace(go.Scatter(x=df_plot['日期'], y=df_plot['MA5'], mode='lines', name='MA5', line=dict(color='orange', width=1)), row=1, col=1)
-        fig.add_trace(go.Scatter(x=df_plot['日期'], y=df_plot['MA20'], mode='lines', name='MA20', line=dict(color='blue', width=1)), row=1, col=1)
 
-        # (2) 成交量
-        colors_vol = ['red' if row['收盤價'] >= row['開盤價'] else 'green' for index, row in df_plot.iterrows()]
-        fig.add_trace(go.Bar(x=df_plot['日期'], y=df_plot['成交股數'], name='成交量', marker_color=colors_vol), row=2, col=1)
+        c1, c2 = st.columns([3, 1])
+        zoom = c1.radio("顯示範圍", list(cb.ZOOM_RANGES), index=1, horizontal=True, key=f"zoom_{stock_id}")
+        show_chips = c2.toggle("顯示三大法人籌碼", key=f"show_chips_{stock_id}")
 
-        # (3) 籌碼圖 (新增的部分!)
-        if df_chips is not None and not df_chips.empty:
-            # 買超顯示紅色，賣超顯示綠色
-            colors_chip = ['red' if val > 0 else 'green' for val in df_chips['合計']]
-            
-            fig.add_trace(go.Bar(
-                x=df_chips['日期'], 
-                y=df_chips['合計'], 
-                name='法人買賣超',
-                marker_color=colors_chip,
-                # 滑鼠移上去可以看到細節
-                customdata=df_chips[['外資', '投信', '自營商']],
-                hovertemplate="<br>日期: %{x}<br>合計: %{y}<br>外資: %{customdata[0]}<br>投信: %{customdata[1]}<br>自營商: %{customdata[2]}"
-            ), row=3, col=1)
-
-        # 版面設定
-        fig.update_layout(height=800, xaxis_rangeslider_visible=False, hovermode="x unified")
+        df_chips = None
+        if show_chips:
+            with st.spinner('正在分析法人動向...'):
+                df_chips = load_chips(stock_id)
+            st.session_state[f"chips_{stock_id}"] = df_chips # 給 Excel 報告使用
+
+        # 範圍超過一開始載入的月份時，再向股價庫要更長的歷史 (已結束的月份抓過一次就存在本機)
+        months = cb.ZOOM_RANGES[zoom] or cb.FULL_HISTORY_MONTHS
+        if months > HISTORY_MONTHS:
+            with st.spinner(f'正在載入近 {months} 個月股價...'):
+                df_longer = fetch_stock_history(stock_id, months)
+            if df_longer is not None:
+                df_price = df_longer
+
+        # 資料整理 (均線、顏色一次算好)，再依範圍切出要畫的部分；點數太多就合併 K 棒
+        df_plot = cb.downsample_ohlc(cb.slice_range(prepare_chart_frame(df_price), cb.ZOOM_RANGES[zoom]))
+
+        fig = cb.build_price_figure(df_plot, f"{stock_id} 股價走勢與成交量", df_chips, "三大法人買賣超 (近10日)")
         st.plotly_chart(fig, use_container_width=True)
-    # ... (後面的財報分析也不用動) ...
 
-    # 4. 顯示財報分析
+
+def render_financial_analysis(df_ratios, insights):
+    # 顯示財報分析
     st.markdown("---")
     st.markdown("### 📊 深度財務分析")
     
@@ -288,10 +192,10 @@ if stock_id:
                 column_config={"資料來源": st.column_config.LinkColumn("財報連結")},
                 hide_index=True
             )
-    # ... (前面的 股價圖、財報分析 都保持原樣) ...
-    # ==========================================
-    # 5. 銀行級徵信報告 (儀表板版)
-    # ==========================================
+
+
+def render_credit_dashboard(df_ratios, score_data):
+    # 銀行級徵信報告 (儀表板版)
     st.markdown("---")
     st.subheader("🏦 企業財務徵信與風險評估報告")
     
@@ -361,30 +265,39 @@ if stock_id:
     else:
         st.error("⚠️ 資料不足，無法產生徵信報告。")
 
-    # ==========================================
-    # ==========================================
-    # 5. 新聞雷達 (修正版：對應新欄位)
-    # ==========================================
+
+def get_target_name(stock_id, info):
+    return info.get('公司名稱', stock_id) if info else stock_id
+
+
+@st.fragment
+def render_news(stock_id, info):
+    # 新聞雷達 (修正版：對應新欄位)
+    # 收合的時候不搜尋；打開開關才抓新聞，而且只重跑這一區
     st.markdown("---")
     st.subheader("📰 市場消息雷達")
     
     # 取得公司名稱
     # 這裡多做一個防呆：如果 info 沒抓到，就用股票代號
-    target_name = info.get('公司名稱', stock_id) if 'info' in locals() and info else stock_id
+    target_name = get_target_name(stock_id, info)
     
     if target_name:
         with st.expander(f"查看 「{target_name}」 的多空消息面", expanded=False):
             
+            if not st.toggle("搜尋多空消息", key=f"show_news_{stock_id}"):
+                st.caption("打開開關後才會搜尋 Google News。")
+                return
+
+            with st.spinner('搜尋新聞中...'):
+                found = load_news(target_name)
+            good_news, bad_news = found['positive'], found['negative']
+
             # 分成左右兩欄
             col_good, col_bad = st.columns(2)
             
             # --- 左邊：正面利多 ---
             with col_good:
                 st.markdown("### 🎉 正面利多")
-                with st.spinner('搜尋好消息...'):
-                    # 呼叫 news.search_news (V8.0 新函式)
-                    good_news = news.search_news(target_name, news_type='positive')
-                
                 if good_news:
                     for n in good_news:
                         st.markdown(f"🟢 **[{n['標題']}]({n['連結']})**")
@@ -397,10 +310,6 @@ if stock_id:
             # --- 右邊：負面風險 ---
             with col_bad:
                 st.markdown("### 💣 負面風險")
-                with st.spinner('搜尋壞消息...'):
-                    # 呼叫 news.search_news (V8.0 新函式)
-                    bad_news = news.search_news(target_name, news_type='negative')
-                
                 if bad_news:
                     for n in bad_news:
                         st.markdown(f"🔴 **[{n['標題']}]({n['連結']})**")
@@ -413,37 +322,33 @@ if stock_id:
             st.caption("資料來源：Google News RSS (AI 自動過濾篩選)")
     else:
         st.warning("無法取得公司名稱，無法搜尋新聞。")
-    # ==========================================
-    # 5. 同業比較 (新功能!)
-    # ==========================================
+
+
+@st.fragment
+def render_peers(stock_id, info):
+    # 同業比較 (打開開關才計算，只重跑這一區)
     st.markdown("---")
     st.subheader("⚖️ 同業估值比較")
     
     # 取得這家公司的產業
-    industry = info.get('產業別', '')
+    industry = (info or {}).get('產業別', '')
     
     if industry:
         st.caption(f"目前所屬產業：**{industry}** (資料來源：台灣證交所)")
-        
+        if not st.toggle("載入同業比較", key=f"show_peers_{stock_id}"):
+            return
+
         with st.spinner(f'正在召集 {industry} 的各路好手...'):
-            df_peers = ca.get_peers_comparison(stock_id, industry)
+            df_peers = load_peers(stock_id, industry)
         
         if df_peers is not None and not df_peers.empty:
+            snapshot_date = df_peers.attrs.get('snapshot_date')
+            if snapshot_date:
+                st.warning(f"⚠️ 證交所即時數據抓取失敗，以下是 {snapshot_date} 的本機快照，不是目前的估值")
             
-            # 為了讓圖表好看，我們只取跟目標股票 本益比 最接近的 5 檔，或是全產業平均
-            # 這裡簡單處理：取本益比最接近目標股票的前後各 4 檔 (共 9 檔)
-            
-            # 找到目標股票的位置
-            try:
-                target_idx = df_peers[df_peers['證券代號'] == stock_id].index[0]
-                current_loc = df_peers.index.get_loc(target_idx)
-                
-                # 取前後範圍
-                start = max(0, current_loc - 4)
-                end = min(len(df_peers), current_loc + 5)
-                df_chart = df_peers.iloc[start:end]
-            except:
-                df_chart = df_peers.head(10) # 如果出錯就取前 10 檔
+            # 為了讓圖表好看，只取跟目標股票 本益比 最接近的前後各 4 檔 (共 9 檔)
+            # 這個範圍已經由同業索引 (ca.get_peers_comparison) 取好，不用再切一次
+            df_chart = df_peers
             
             # 準備畫圖
             tab1, tab2 = st.tabs(["📊 本益比 (PE) PK", "💰 殖利率 (Yield) PK"])
@@ -487,9 +392,10 @@ if stock_id:
             st.info("該產業資料不足或無同業可比較。")
     else:
         st.warning("無法識別產業類別，無法進行比較。")
-    # ==========================================
-    # 5. 銀行級徵信報告 (信用評分 + 杜邦分析)
-    # ==========================================
+
+
+def render_credit_report(df_ratios, insights, score_data):
+    # 銀行級徵信報告 (信用評分 + 杜邦分析)
     st.markdown("---")
     st.subheader("📑 財務體質徵信報告")
     
@@ -552,25 +458,112 @@ if stock_id:
                 
     else:
         st.error("資料不足，無法產生徵信報告。")
-    # ==========================================
-    # 7. 下載 Excel 報告 (放在最下面執行，顯示在左邊)一定放在最後面!!!!!!!!!!!!!
-    # ==========================================
-    if stock_id and 'score_data' in locals() and score_data:
+
+
+def render_download(stock_id, info, df_price, df_ratios, df_chips, score_data):
+    # 下載 Excel 報告 (顯示在左邊 Sidebar)
+    if stock_id and score_data:
         with st.sidebar:
             st.success("✅ 分析完成！")
             
             # 產生 Excel 檔案
             excel_data = rg.generate_excel_report(
                 stock_id, info, df_price, df_ratios, 
-                df_chips if 'df_chips' in locals() else None, 
+                df_chips, 
                 score_data
             )
             
-            file_name = f"{stock_id}_{info.get('公司名稱','股票')}_徵信報告.xlsx"
+            file_name = f"{stock_id}_{(info or {}).get('公司名稱','股票')}_徵信報告.xlsx"
             
             st.download_button(
                 label="📥 下載完整 Excel 報告",
                 data=excel_data,
                 file_name=file_name,
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
\ No newline at end of file
+            )
+
+
+def render_debug_panel():
+    # 效能除錯面板：這個 session 所有 span 的彙總 (展開的區塊只重跑自己，數字要等整頁重跑才會更新)
+    session_id = current_session_id()
+    spans = telemetry.session_spans(session_id)
+    with st.sidebar:
+        st.markdown("### 🐞 效能除錯")
+        if not spans:
+            st.caption("尚無紀錄。")
+            return
+
+        summary = telemetry.summarize(spans)
+        by_kind = summary.groupby('kind')['總耗時_ms'].sum()
+        c1, c2 = st.columns(2)
+        c1.metric("對外抓取", f"{by_kind.get('fetch', 0) / 1000:.2f} 秒")
+        c2.metric("分析階段", f"{by_kind.get('stage', 0) / 1000:.2f} 秒")
+        st.caption("抓取時間包含在分析階段內；同時進行的工作會重複計算")
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+
+        with st.expander("最近 50 筆紀錄"):
+            st.dataframe(pd.DataFrame(spans[-50:][::-1]), hide_index=True)
+        st.download_button("📥 下載 JSON 紀錄", data=telemetry.to_json_lines(spans),
+                           file_name="telemetry.jsonl", mime="application/json")
+        if st.button("🧹 清除紀錄"):
+            telemetry.clear(session_id)
+
+
+# ==========================================
+# 5. 主程式：並行載入 + 先到先畫
+# ==========================================
+# 讓背景執行緒也能使用 st.cache_data (需要掛上目前這次執行的 context)
+script_ctx = get_script_run_ctx()
+
+def attach_script_ctx():
+    add_script_run_ctx(threading.current_thread(), script_ctx)
+
+if stock_id:
+    # 1. 先把每個區塊的位置排好 (畫面順序不變)，資料到了再填進去
+    #    每個區塊：(需要的資料, 渲染函式)
+    #    股價圖 (含籌碼)、新聞、同業是獨立的 fragment，打開開關時才抓資料，也只重跑自己那一區
+    sections = {
+        'basic': (['info'], lambda r: render_basic_info(stock_id, r['info'])),
+        'price': (['price'], lambda r: render_price_chart(stock_id, r['price'])),
+        'fin': (['fin'], lambda r: render_financial_analysis(r['fin'][0], r['fin'][1])),
+        'dashboard': (['fin'], lambda r: render_credit_dashboard(r['fin'][0], r['fin'][2])),
+        'news': (['info'], lambda r: render_news(stock_id, r['info'])),
+        'peers': (['info'], lambda r: render_peers(stock_id, r['info'])),
+        'report': (['fin'], lambda r: render_credit_report(r['fin'][0], r['fin'][1], r['fin'][2])),
+        # 籌碼有打開過才放進報告
+        'download': (['info', 'price', 'fin'], lambda r: render_download(stock_id, r['info'], r['price'], r['fin'][0], st.session_state.get(f"chips_{stock_id}"), r['fin'][2])),
+    }
+    slots = {}
+    for name in sections:
+        box = st.container()
+        slots[name] = (box, box.empty())
+        if name != 'download':
+            slots[name][1].caption("⏳ 資料載入中...")
+
+    if refresh_fin: # 手動重抓財報：清掉網頁快取，並略過本機財報快取
+        load_financials.clear()
+
+    # 2. 所有獨立的抓取同時出發 (都有快取，重跑時幾乎不花時間)
+    with LoadOrchestrator(max_workers=8, initializer=attach_script_ctx) as loader:
+        # 外面再包一層 load span：網頁快取命中時只會看到這一層，幾乎不花時間
+        loader.submit('info', telemetry.timed("載入 基本資料", kind="load")(load_company_info), stock_id)
+        loader.submit('fin', telemetry.timed("載入 財報", kind="load")(load_financials), stock_id, refresh=refresh_fin)
+        loader.submit('price', telemetry.timed("載入 股價", kind="load")(fetch_stock_history), stock_id)
+
+        # 3. 誰先回來就先畫誰
+        results = {}
+        for task_name, result in loader.as_completed():
+            if task_name == 'fin' and result is None:
+                result = (None, [], None)
+            results[task_name] = result
+
+            for name, (needs, render) in list(sections.items()):
+                if all(n in results for n in needs):
+                    box, loading = slots[name]
+                    loading.empty()
+                    with box:
+                        render(results)
+                    del sections[name]
+
+if show_debug:
+    render_debug_panel()
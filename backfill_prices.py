@@ -0,0 +1,115 @@
+"""
+[股價歷史回補]
+把一份股票清單在指定期間內的日成交資訊 (STOCK_DAY) 全部抓進本機股價庫 (price_store)
+回測、Z-Score 驗證需要十年以上的日線時使用
+
+使用方式：
+    python backfill_prices.py --codes 2330 2317 --start 2014-01-01
+    python backfill_prices.py --start 2014-01-01 --workers 6           # 預設讀全市場清單，適合放一整晚
+    python backfill_prices.py --codes-file watchlist.txt --start 2020-01 --end 2023-12
+
+每完成一個 (股票, 月份) 就寫進 price_store 的 stock_month 表，中斷後重跑同一個指令會從缺的月份繼續
+已結束且抓過的月份不會再下載；所有執行緒共用 http_client 的速率限制
+"""
+import argparse
+import concurrent.futures as cf
+import os
+import time
+import pandas as pd
+import http_client
+import price_store as ps
+import trading_calendar
+from batch_credit import DEFAULT_UNIVERSE, load_universe, read_codes_file
+
+# ==========================================
+# 1. 列出還缺的 (股票, 月份)
+# ==========================================
+def pending_months(codes, start, end):
+    """回傳 [(代號, 月份 1 號)]，新的月份排前面 (中途停下時最近的資料先到手)"""
+    month_list = trading_calendar.trading_months(start, end)
+    tasks = []
+    for code in codes:
+        tasks += [(code, m) for m in ps.missing_months(code, month_list)]
+    tasks.sort(key=lambda t: t[1], reverse=True)
+    return tasks
+
+def backfill_one(code, month_start):
+    """抓一個月並寫入；成功回傳筆數，失敗回傳 None (下次重跑會再抓)"""
+    df = ps.fetch_month(code, month_start)
+    if df is None:
+        return None
+    ps.save_month(code, month_start, df)
+    return len(df)
+
+# ==========================================
+# 2. 並行回補
+# ==========================================
+def run(codes, start, end, workers=4):
+    tasks = pending_months(codes, start, end)
+    print(f"📆 {len(codes)} 檔股票，{pd.Timestamp(start):%Y-%m} ~ {pd.Timestamp(end):%Y-%m}，"
+          f"還缺 {len(tasks)} 個月份 (並行 {workers})")
+    if not tasks:
+        return 0, 0
+
+    done, failed, rows = 0, 0, 0
+    t0 = time.monotonic()
+    pool = cf.ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(backfill_one, code, m): (code, m) for code, m in tasks}
+        for future in cf.as_completed(futures):
+            code, m = futures[future]
+            try:
+                n = future.result()
+            except Exception as e:
+                print(f"   ❌ {code} {m:%Y-%m} 寫入失敗: {e}")
+                n = None
+            if n is None:
+                failed += 1
+            else:
+                done += 1
+                rows += n
+            finished = done + failed
+            if finished % 100 == 0 or finished == len(tasks):
+                rate = finished / max(time.monotonic() - t0, 1e-9)
+                eta = (len(tasks) - finished) / rate if rate else 0
+                print(f"   ⏳ {finished}/{len(tasks)} 個月份 ({rows} 筆)，失敗 {failed}，約剩 {eta / 60:.0f} 分鐘")
+    except KeyboardInterrupt:
+        print("⏹️ 已中斷，完成的月份都已存檔，重跑同一個指令即可續跑")
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    print(f"🏁 完成 {done} 個月份 ({rows} 筆)，失敗 {failed} 個 (重跑即可補抓)")
+    return done, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="股價歷史回補 (STOCK_DAY)")
+    parser.add_argument('--codes', nargs='*', help="股票代號 (不給就用全市場清單)")
+    parser.add_argument('--codes-file', help="代號清單檔案")
+    parser.add_argument('--universe', default=DEFAULT_UNIVERSE, help="全市場清單 CSV")
+    parser.add_argument('--start', default=f"{pd.Timestamp.now().year - 10}-01-01", help="起始日期 (預設十年前)")
+    parser.add_argument('--end', default=None, help="結束日期 (預設今天)")
+    parser.add_argument('--workers', type=int, default=4, help="同時抓取的數量")
+    parser.add_argument('--rate', type=float, default=None, help="每秒最多幾次 www.twse.com.tw 請求 (預設沿用 http_client)")
+    args = parser.parse_args()
+
+    if args.codes:
+        codes = args.codes
+    elif args.codes_file:
+        codes = read_codes_file(args.codes_file)
+    elif os.path.exists(args.universe):
+        codes = load_universe(args.universe)['證券代號'].tolist()
+    else:
+        parser.error("請用 --codes 或 --codes-file 指定股票代號")
+
+    if args.rate:
+        http_client.set_rate_limit("twse.com.tw", args.rate, capacity=max(1, int(args.rate)))
+
+    end = pd.Timestamp(args.end) if args.end else pd.Timestamp.now()
+    try:
+        run(list(dict.fromkeys(codes)), pd.Timestamp(args.start), end, workers=args.workers)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+[全市場信用評分批次]
+一次替整份股票清單算出 信用總分 / 評級 / Z-Score 狀態，輸出一張排名表
+
+使用方式：
+    python batch_credit.py                          # 預設讀 market_fundamentals_20240205.csv 的全部代號
+    python batch_credit.py --codes 2330 2317 2454   # 指定代號
+    python batch_credit.py --codes-file watchlist.txt --workers 16
+
+中途中斷後重跑同一個指令，已完成的公司會從 checkpoint 直接讀回，不再重抓
+"""
+import argparse
+import concurrent.futures as cf
+import json
+import os
+import threading
+import pandas as pd
+import financial_data as fd
+import local_store
+import snapshot_loader
+
+DEFAULT_UNIVERSE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_fundamentals_20240205.csv")
+DEFAULT_CHECKPOINT = os.path.join(local_store.DATA_DIR, "credit_checkpoint.jsonl")
+
+# ==========================================
+# 1. 股票清單
+# ==========================================
+def load_universe(path=DEFAULT_UNIVERSE):
+    """讀取全市場清單，回傳 DataFrame (證券代號, 證券名稱)"""
+    df = snapshot_loader.load(path) # 讀過一次之後直接讀欄式快照
+    return df[['證券代號', '證券名稱']].drop_duplicates('證券代號')
+
+def read_codes_file(path):
+    """一行一個代號 (可用逗號分隔，# 開頭為註解)"""
+    codes = []
+    with open(path, encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.split('#')[0]
+            codes += [c.strip() for c in line.split(',') if c.strip()]
+    return codes
+
+# ==========================================
+# 2. Checkpoint (每完成一家就寫一行，重跑時略過)
+# ==========================================
+def load_checkpoint(path):
+    """回傳 {代號: 紀錄}"""
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    done[record['證券代號']] = record
+                except ValueError:
+                    pass # 中斷時寫到一半的最後一行
+    return done
+
+def fetch_one(code):
+    """抓一家公司最新一期的財報科目"""
+    items = fd.get_statement_items(code, periods=1)
+    if items is None or items.empty:
+        return {"證券代號": code, "error": "資料不足"}
+    row = items.iloc[0]
+    record = {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+    record["證券代號"] = code
+    record["期間"] = str(items.index[0].year)
+    return record
+
+def run_batch(codes, checkpoint=DEFAULT_CHECKPOINT, workers=8):
+    """
+    用有上限的執行緒池平行抓財報
+    每完成一家立刻寫入 checkpoint；回傳所有 (含先前完成) 的紀錄
+    """
+    os.makedirs(os.path.dirname(checkpoint) or '.', exist_ok=True)
+    done = load_checkpoint(checkpoint)
+    # 連線錯誤、被限流 (Yahoo 回空資料) 的公司重跑時再試一次；確定資料不足的就不再浪費請求
+    todo = [c for c in codes if c not in done or done[c].get('error', '資料不足') != '資料不足']
+    print(f"🏦 共 {len(codes)} 家，已完成 {len(codes) - len(todo)} 家，本次要抓 {len(todo)} 家 (並行 {workers})")
+
+    lock = threading.Lock()
+    with open(checkpoint, 'a', encoding='utf-8') as out, cf.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_one, code): code for code in todo}
+        for i, future in enumerate(cf.as_completed(futures), 1):
+            code = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {"證券代號": code, "error": str(e)}
+            with lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+            done[code] = record
+            if i % 50 == 0 or i == len(todo):
+                print(f"   ⏳ {i}/{len(todo)}")
+
+    return [done[c] for c in codes if c in done]
+
+# ==========================================
+# 3. 一次評分 + 排名
+# ==========================================
+def rank_results(records, names=None):
+    """把所有公司的科目堆成一張表，一次算比率與評分，依總分排序"""
+    ok = [r for r in records if 'error' not in r]
+    if not ok:
+        return pd.DataFrame()
+
+    items = pd.DataFrame(ok).set_index('證券代號')
+    ratios = fd.compute_ratios(items)
+    scores = fd.score_ratios(ratios)
+
+    result = pd.concat([items[['期間']], scores[['總分', '評級', 'Z-Score', 'Z-Status']], ratios.drop(columns=['Z-Score'])], axis=1)
+    if names is not None:
+        result.insert(0, '證券名稱', names.reindex(result.index))
+    result = result.sort_values(['總分', 'Z-Score'], ascending=False)
+    result.insert(0, '排名', range(1, len(result) + 1))
+    return result.reset_index()
+
+def main():
+    parser = argparse.ArgumentParser(description="全市場信用評分批次")
+    parser.add_argument('--codes', nargs='*', help="股票代號 (不給就用全市場清單)")
+    parser.add_argument('--codes-file', help="代號清單檔案")
+    parser.add_argument('--universe', default=DEFAULT_UNIVERSE, help="全市場清單 CSV")
+    parser.add_argument('--workers', type=int, default=8, help="同時抓取的數量")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help="checkpoint 檔案 (重跑時續跑)")
+    parser.add_argument('--output', default=f"credit_screening_{pd.Timestamp.now():%Y%m%d}.csv", help="輸出排名表")
+    args = parser.parse_args()
+
+    universe = load_universe(args.universe) if os.path.exists(args.universe) else None
+    if args.codes:
+        codes = args.codes
+    elif args.codes_file:
+        codes = read_codes_file(args.codes_file)
+    elif universe is not None:
+        codes = universe['證券代號'].tolist()
+    else:
+        parser.error(f"找不到全市場清單 {args.universe}，請用 --codes 或 --codes-file 指定股票代號")
+
+    records = run_batch(codes, checkpoint=args.checkpoint, workers=args.workers)
+    names = universe.set_index('證券代號')['證券名稱'] if universe is not None else None
+    result = rank_results(records, names)
+
+    result.to_csv(args.output, index=False, encoding='utf-8-sig')
+    no_data = sum(1 for r in records if r.get('error') == '資料不足')
+    failed = sum(1 for r in records if 'error' in r) - no_data
+    print(f"✅ 完成：{len(result)} 家已評分，{no_data} 家資料不足，{failed} 家抓取失敗 (重跑即可補抓) → {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+[批次徵信報告匯出]
+替一份客戶清單每家產出一本徵信報告 Excel，外加一本總表
+
+使用方式：
+    python batch_report.py --codes 2330 2317 2454
+    python batch_report.py --codes-file borrowers.txt --out reports/202410 --workers 6
+
+中途中斷後重跑同一個指令，已經產出的公司會直接略過
+所有執行緒共用 http_client 的速率限制，不會因為並行而被證交所封鎖
+"""
+import argparse
+import concurrent.futures as cf
+import json
+import os
+import threading
+import pandas as pd
+import company_info as ci
+import financial_data as fd
+import chips_analysis as chips
+import price_store as ps
+import report_generator as rg
+from batch_credit import read_codes_file
+
+PROGRESS_FILE = "_progress.jsonl"
+
+def report_path(out_dir, stock_code):
+    return os.path.join(out_dir, f"{stock_code}_徵信報告.xlsx")
+
+def load_progress(out_dir):
+    """讀回已完成的公司 (報告檔也必須還在)"""
+    done = {}
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # 中斷時寫到一半的最後一行
+                if os.path.exists(report_path(out_dir, record['證券代號'])):
+                    done[record['證券代號']] = record
+    return done
+
+def build_one(stock_code, out_dir, df_chips_all):
+    """抓一家公司的資料並寫出報告，回傳總表要用的摘要"""
+    info = ci.get_company_basic_info(stock_code)
+    df_ratios, insights, score_data = fd.get_comprehensive_analysis(stock_code)
+    df_price = ps.get_history(stock_code, months=6)
+
+    df_chips = None
+    if df_chips_all is not None:
+        df_chips = df_chips_all[df_chips_all['證券代號'] == stock_code].drop(columns=['證券代號'])
+
+    data = rg.generate_excel_report(stock_code, info, df_price, df_ratios, df_chips, score_data)
+
+    # 先寫暫存檔再改名，避免中斷時留下壞掉的 Excel
+    path = report_path(out_dir, stock_code)
+    with open(path + ".tmp", 'wb') as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+    score_data = score_data or {}
+    return {
+        "證券代號": stock_code,
+        "公司名稱": (info or {}).get('公司名稱', ''),
+        "產業別": (info or {}).get('產業別', ''),
+        "總分": score_data.get('總分'),
+        "評級": score_data.get('評級', '資料不足'),
+        "Z-Score": score_data.get('Z-Score'),
+        "Z-Status": score_data.get('Z-Status', ''),
+        "報告檔案": os.path.basename(path),
+    }
+
+def run(codes, out_dir, workers=4, chip_days=10):
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_progress(out_dir)
+    todo = [c for c in codes if c not in done]
+    print(f"📑 共 {len(codes)} 家，已完成 {len(codes) - len(todo)} 家，本次產出 {len(todo)} 家 (並行 {workers})")
+
+    # 法人籌碼一次抓全部公司 (成本只跟天數有關)
+    df_chips_all = chips.get_chips_data(todo, days=chip_days) if todo else None
+
+    lock = threading.Lock()
+    with open(os.path.join(out_dir, PROGRESS_FILE), 'a', encoding='utf-8') as progress, \
+            cf.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_one, code, out_dir, df_chips_all): code for code in todo}
+        for i, future in enumerate(cf.as_completed(futures), 1):
+            code = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"   ❌ {code} 報告產出失敗: {e}")
+                continue
+            with lock:
+                progress.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                progress.flush()
+            done[code] = record
+            print(f"   ✅ {i}/{len(todo)} {code} {record['公司名稱']} {record['評級']}")
+
+    # 總表：依總分排序
+    df_summary = pd.DataFrame([done[c] for c in codes if c in done])
+    if not df_summary.empty:
+        df_summary = df_summary.sort_values('總分', ascending=False, na_position='last')
+        with open(os.path.join(out_dir, "徵信報告總表.xlsx"), 'wb') as f:
+            f.write(rg.generate_summary_report(df_summary))
+    print(f"🏁 完成 {len(df_summary)}/{len(codes)} 家 → {out_dir}")
+    return df_summary
+
+def main():
+    parser = argparse.ArgumentParser(description="批次徵信報告匯出")
+    parser.add_argument('--codes', nargs='*', help="股票代號")
+    parser.add_argument('--codes-file', help="代號清單檔案 (一行一個)")
+    parser.add_argument('--out', default=f"reports_{pd.Timestamp.now():%Y%m}", help="輸出資料夾")
+    parser.add_argument('--workers', type=int, default=4, help="同時處理的公司數")
+    parser.add_argument('--chip-days', type=int, default=10, help="法人籌碼天數")
+    args = parser.parse_args()
+
+    codes = list(args.codes or [])
+    if args.codes_file:
+        codes += read_codes_file(args.codes_file)
+    if not codes:
+        parser.error("請用 --codes 或 --codes-file 指定股票代號")
+
+    run(list(dict.fromkeys(codes)), args.out, workers=args.workers, chip_days=args.chip_days)
+
+if __name__ == "__main__":
+    main()
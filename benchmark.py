@@ -0,0 +1,348 @@
+"""
+[效能測試]
+離線量測主要熱點的執行時間與記憶體高峰，結果輸出成 JSON，方便比較不同版本
+
+    python benchmark.py                                   # 1 檔、100 檔、全市場三種規模
+    python benchmark.py --scales 1 100 --repeat 5
+    python benchmark.py --output bench_results.json --fixtures fixtures/2024Q1
+
+測試資料：fixture 資料夾 (replay.py 錄製) 裡有 STOCK_DAY / T86 / RSS 就用錄製的回應，
+沒有就用專案內的 CSV 快照 (market_fundamentals、stock_history_2330) 以固定亂數種子展開
+執行時本機資料夾指向暫存目錄、replay 設為重播模式，任何漏網的連線都會直接失敗，不會真的上網
+"""
+import argparse
+import contextlib
+import glob
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# 必須在匯入專案模組之前設定 (各模組在匯入時讀取)
+_WORK_DIR = tempfile.mkdtemp(prefix="findog_bench_")
+os.environ["FINDOG_DATA_DIR"] = _WORK_DIR
+os.environ["FINDOG_REPLAY"] = "replay"
+
+import numpy as np
+import pandas as pd
+import chips_analysis as chips
+import competitor_analysis as ca
+import financial_data as fd
+import news_analyzer as news
+import price_store as ps
+import replay
+import report_generator as rg
+import snapshot_loader
+import t86_store
+import trading_calendar
+
+SEED = 42
+CHIP_DAYS = 10
+ENTRIES_PER_FEED = 100 # Google News RSS 一次最多回傳 100 則
+INDUSTRIES = [f"產業{i:02d}" for i in range(30)]
+
+# ==========================================
+# 1. 測試資料 (錄製的 fixture 優先，其次是專案內的 CSV)
+# ==========================================
+def _recorded(url_part):
+    """從 fixtures/http 讀出網址含 url_part 的錄製回應 (JSON)"""
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(replay.FIXTURE_DIR, "http", "*.json"))):
+        with open(path, encoding='utf-8') as f:
+            record = json.load(f)
+        if url_part in record["url"] and record["format"] == "text":
+            try:
+                data = json.loads(record["body"])
+            except ValueError:
+                continue
+            if isinstance(data, dict) and data.get('stat') == 'OK':
+                payloads.append(data)
+    return payloads
+
+def _stock_day_payloads():
+    """6 個月的 STOCK_DAY 回應 (與 fetch_stock_history 預設相同)"""
+    recorded = _recorded("STOCK_DAY")
+    if recorded:
+        return recorded[:6], "fixtures"
+
+    df = snapshot_loader.read_twse_csv(os.path.join(snapshot_loader.SOURCE_DIR, "stock_history_2330.csv"))
+    dates = pd.to_datetime(df['日期'])
+    payloads = []
+    for _, month in df.groupby(dates.dt.to_period('M')):
+        d = pd.to_datetime(month['日期'])
+        rows = pd.DataFrame({'日期': (d.dt.year - 1911).astype(str) + d.dt.strftime('/%m/%d')})
+        for col in ps.NUMERIC_COLUMNS:
+            rows[col] = month[col].map(lambda v: f"{v:,.2f}" if pd.notna(v) else "--").values
+        rows['註記'] = month['註記'].values
+        payloads.append({"stat": "OK", "fields": ps.STOCK_DAY_COLUMNS,
+                         "data": rows[ps.STOCK_DAY_COLUMNS].values.tolist()})
+    return payloads[:6], "csv"
+
+def _t86_frame(universe, rng):
+    """一天的全市場 T86 (parse_t86 的輸出格式)"""
+    recorded = _recorded("T86")
+    if recorded:
+        return t86_store.parse_t86(recorded[0]), "fixtures"
+
+    n = len(universe)
+    flows = rng.integers(-5_000_000, 5_000_000, size=(n, 3))
+    df = pd.DataFrame({
+        'code': universe['證券代號'].values,
+        'name': universe['證券名稱'].values,
+        '外資': flows[:, 0], '投信': flows[:, 1], '自營商': flows[:, 2],
+    })
+    df['合計'] = df[['外資', '投信', '自營商']].sum(axis=1)
+    df['raw'] = [json.dumps({"證券代號": c, "證券名稱": nm, "三大法人買賣超股數": f"{t:,}"}, ensure_ascii=False)
+                 for c, nm, t in zip(df['code'], df['name'], df['合計'])]
+    return df, "csv"
+
+class _Entry(dict):
+    """與 feedparser 的 entry 相同的用法 (entry.title、'published' in entry)"""
+    __getattr__ = dict.__getitem__
+
+def _feed_entries(names, rng):
+    """每家公司一份 RSS：公司名稱 / 別家公司 / 正負面詞 隨機組合成標題"""
+    recorded = []
+    for path in sorted(glob.glob(os.path.join(replay.FIXTURE_DIR, "http", "*.json"))):
+        with open(path, encoding='utf-8') as f:
+            record = json.load(f)
+        if "news.google.com/rss" in record["url"] and record["status"] == 200 and record["format"] == "text":
+            import feedparser # 只有錄製過 RSS 時才需要
+            recorded += list(feedparser.parse(record["body"].encode('utf-8')).entries)
+    if recorded:
+        return lambda i: recorded, "fixtures"
+
+    vocab = news.POSITIVE_KEYWORDS + news.NEGATIVE_KEYWORDS + news.POSITIVE_EXCLUDE + news.NEGATIVE_EXCLUDE
+    fillers = ["法說會", "股東會", "董事會", "外資", "新廠", "報價", "庫存", "展望"]
+
+    def make(i):
+        own = names[i % len(names)]
+        entries = []
+        for j in range(ENTRIES_PER_FEED):
+            subject = own if j % 3 else names[int(rng.integers(len(names)))]
+            words = rng.choice(vocab, size=2).tolist() + rng.choice(fillers, size=2).tolist()
+            title = f"{subject}{words[0]}，{words[2]}{words[1]}{words[3]} - 新聞網"
+            entries.append(_Entry(title=title, link=f"https://news.example/{i}/{j}", published="Mon, 05 Feb 2024 08:00:00 GMT",
+                                  source=_Entry(title="新聞網")))
+        return entries
+    return make, "csv"
+
+def _yahoo_statements(rng, periods=3):
+    """Yahoo 三大報表格式的假資料 (科目 x 期間)"""
+    columns = pd.DatetimeIndex([f"{2023 - i}-12-31" for i in range(periods)]) # 由新到舊 (與 Yahoo 相同)
+    def frame(items):
+        return pd.DataFrame(rng.uniform(1e9, 1e11, size=(len(items), periods)), index=list(items.values()), columns=columns)
+    return frame(fd.FIN_ITEMS), frame(fd.BS_ITEMS), frame(fd.CF_ITEMS), float(rng.uniform(1e10, 1e12))
+
+class Inputs:
+    """所有測試共用的資料 (只準備一次，不計入時間)"""
+
+    def __init__(self):
+        rng = np.random.default_rng(SEED)
+        universe_path = snapshot_loader.latest("market_fundamentals_*.csv")
+        self.universe = snapshot_loader.read_twse_csv(universe_path)[['證券代號', '證券名稱']].drop_duplicates('證券代號')
+        self.codes = self.universe['證券代號'].tolist()
+        self.names = self.universe['證券名稱'].tolist()
+        self.sources = {}
+
+        self.stock_day, self.sources['stock_day'] = _stock_day_payloads()
+
+        # T86：最近 CHIP_DAYS 個交易日都寫入本機 (暫存目錄)，get_chips_data 不會上網
+        t86, self.sources['t86'] = _t86_frame(self.universe, rng)
+        self.chip_dates = list(itertools.islice(trading_calendar.iter_trading_days_back(), CHIP_DAYS))
+        for date_obj in self.chip_dates:
+            t86_store.save_day(date_obj, t86)
+
+        # 同業：大盤數據取自 CSV 快照，產業別依代號平均分配
+        stats = snapshot_loader.market_stats()
+        self.market_stats = stats if not stats.empty else pd.DataFrame({'證券代號': self.codes})
+        self.industry_of = {c: INDUSTRIES[i % len(INDUSTRIES)] for i, c in enumerate(self.codes)}
+        self.industry_map = pd.DataFrame({'公司代號': self.codes, '公司名稱': self.names,
+                                          '產業別': [self.industry_of[c] for c in self.codes]})
+
+        self.statements = [_yahoo_statements(rng) for _ in range(len(self.codes))]
+        self.feed_for, self.sources['news'] = _feed_entries(self.names, rng)
+        self.feeds = [self.feed_for(i) for i in range(len(self.codes))]
+
+        # Excel 報告的內容
+        self.df_price = pd.concat([ps.parse_stock_day(p) for p in self.stock_day], ignore_index=True)
+        self.df_chips = t86.head(CHIP_DAYS)[['外資', '投信', '自營商', '合計']].assign(日期=self.chip_dates)
+        fin, bs, cf, cap = self.statements[0]
+        ratios = fd.compute_ratios(fd.statement_items(fin, bs, cf, cap, fin.columns[:3]))
+        self.df_ratios = ratios.reset_index(drop=True)
+        score = fd.score_ratios(ratios.iloc[[0]]).iloc[0]
+        self.score_data = {
+            "總分": int(score["總分"]), "評級": score["評級"],
+            "Z-Score": float(score["Z-Score"]), "Z-Status": score["Z-Status"],
+            "細項": [{"項目": name, "數值": float(ratios.iloc[0][col]), "評語": score[f"{name}評語"], "得分": int(score[f"{name}得分"])}
+                     for name, col, _ in fd.SCORE_ITEMS],
+        }
+
+# ==========================================
+# 2. 測試項目：case(inputs, n) 回傳一個不帶參數的函式
+# ==========================================
+def case_parse_stock_day(inp, n):
+    """fetch_stock_history：n 檔 x 6 個月的 STOCK_DAY 解析 (民國日期轉換)"""
+    def run():
+        for _ in range(n):
+            for payload in inp.stock_day:
+                ps.parse_stock_day(payload)
+    return run
+
+def case_chips(inp, n):
+    """get_chips_data：從本機 T86 篩出 n 檔近 10 日法人買賣超"""
+    target = inp.codes[0] if n == 1 else inp.codes[:n]
+    return lambda: chips.get_chips_data(target, days=CHIP_DAYS)
+
+def case_peers(inp, n):
+    """get_peers_comparison：大盤 + 產業表合併、建立同業索引、查詢 n 檔"""
+    def run():
+        merged = pd.merge(inp.market_stats, inp.industry_map, left_on='證券代號', right_on='公司代號', how='inner')
+        index = ca.PeerIndex(merged)
+        for code in inp.codes[:n]:
+            index.nearest(code, inp.industry_of[code])
+    return run
+
+def case_ratios(inp, n):
+    """get_comprehensive_analysis：n 檔各自整理科目、算比率、評分"""
+    def run():
+        for fin, bs, cf, cap in inp.statements[:n]:
+            ratios = fd.compute_ratios(fd.statement_items(fin, bs, cf, cap, fin.columns[:3]))
+            fd.score_ratios(ratios.iloc[[0]])
+    return run
+
+def case_ratios_batch(inp, n):
+    """batch_credit：n 檔最新一期堆成一張表，一次算比率與評分"""
+    frames = [fd.statement_items(fin, bs, cf, cap, fin.columns[:1]) for fin, bs, cf, cap in inp.statements[:n]]
+    items = pd.concat(frames, ignore_index=True)
+    return lambda: fd.score_ratios(fd.compute_ratios(items))
+
+def case_news(inp, n):
+    """search_news：n 家公司各一份 RSS (100 則) 的標題過濾，正負面各一次"""
+    def run():
+        for i in range(n):
+            name = news.clean_company_name(inp.names[i])
+            news.filter_entries(inp.feeds[i], name, news.POSITIVE_EXCLUDE)
+            news.filter_entries(inp.feeds[i], name, news.NEGATIVE_EXCLUDE)
+    return run
+
+def case_news_scan(inp, n):
+    """scan_entries：n 份 RSS 的所有標題一次掃描 n 家公司的多空消息"""
+    entries = [e for feed in inp.feeds[:n] for e in feed]
+    names = inp.names[:n]
+    def run():
+        news._matcher.cache_clear() # 比對器的編譯時間也算進去
+        news.scan_entries(entries, names)
+    return run
+
+def case_excel(inp, n):
+    """generate_excel_report：產出 n 本徵信報告 (不經過結果快取)"""
+    def run():
+        for code, name in zip(inp.codes[:n], inp.names[:n]):
+            rg.build_workbook(code, {"公司名稱": name}, inp.df_price, inp.df_ratios, inp.df_chips, inp.score_data)
+    return run
+
+CASES = {
+    "parse_stock_day": case_parse_stock_day,
+    "chips_filter": case_chips,
+    "peers_merge_sort": case_peers,
+    "ratios_scoring": case_ratios,
+    "ratios_scoring_batch": case_ratios_batch,
+    "news_filter": case_news,
+    "news_scan_many": case_news_scan,
+    "excel_report": case_excel,
+}
+
+# ==========================================
+# 3. 量測
+# ==========================================
+def measure(fn, repeat):
+    """先暖身一次，再量 repeat 次時間；最後單獨跑一次 tracemalloc 量記憶體高峰"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds_min": min(times),
+        "seconds_median": statistics.median(times),
+        "seconds_max": max(times),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def run(scales, repeat, cases):
+    # 各模組的進度訊息改印到 stderr，stdout 只留 JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        inp = Inputs()
+        results = []
+        for name in cases:
+            for scale in scales:
+                n = len(inp.codes) if scale == "all" else min(int(scale), len(inp.codes))
+                print(f"⏱️ {name} x {n}", file=sys.stderr)
+                entry = {"case": name, "scale": scale, "n": n, "repeat": repeat}
+                try:
+                    entry.update(measure(CASES[name](inp, n), repeat))
+                except Exception as e: # 例如沒有安裝 xlsxwriter
+                    entry["error"] = f"{type(e).__name__}: {e}"
+                results.append(entry)
+
+    return {
+        "meta": {
+            "timestamp": pd.Timestamp.now().isoformat(timespec='seconds'),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "market_size": len(inp.codes),
+            "data_sources": inp.sources,
+        },
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="離線效能測試")
+    parser.add_argument('--scales', nargs='*', default=["1", "100", "all"], help="股票檔數 (all = 全市場)")
+    parser.add_argument('--repeat', type=int, default=3, help="每項量測次數")
+    parser.add_argument('--cases', nargs='*', default=list(CASES), choices=list(CASES), help="只跑指定項目")
+    parser.add_argument('--fixtures', help="錄製資料夾 (預設 replay.FIXTURE_DIR)")
+    parser.add_argument('--output', help="JSON 輸出檔 (預設印在畫面)")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        replay.configure(fixture_dir=args.fixtures)
+    try:
+        report = run(args.scales, args.repeat, args.cases)
+    finally:
+        shutil.rmtree(_WORK_DIR, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"📊 已寫入 {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import functools
+import threading
+import time
+
+# ==========================================
+# 可替換的快取 (核心模組不依賴 Streamlit)
+# ==========================================
+def memory_cache(ttl):
+    """
+    預設的快取：同一個程式內以參數為 key 記住結果，超過 ttl 秒重算
+    批次工作、排程 (cron) 都用這個
+    """
+    def decorator(fn):
+        store = {}
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                hit = store.get(key)
+                if hit is not None and now - hit[0] < ttl:
+                    return hit[1]
+            value = fn(*args, **kwargs)
+            with lock:
+                store[key] = (now, value)
+            return value
+
+        wrapper.clear = store.clear
+        return wrapper
+    return decorator
+
+def streamlit_cache(ttl):
+    """網頁上的快取：Streamlit 的 st.cache_data (用到才載入 streamlit)"""
+    import streamlit as st
+    return st.cache_data(ttl=ttl)
+
+_backend = memory_cache
+
+def set_backend(factory):
+    """
+    換掉快取實作，factory(ttl) 需回傳一個 decorator
+    例如 app.py：cache_utils.set_backend(cache_utils.streamlit_cache)
+    factory 要傳模組層級的函式：每次 rerun 都建一個新的 lambda 會讓快取一直重建
+    """
+    global _backend
+    _backend = factory
+
+def cached(ttl):
+    """
+    [快取裝飾器]
+    實際使用哪一種快取在「呼叫時」才決定，所以 app.py 可以在匯入模組之後再設定
+    只保留目前 backend 包好的那一個函式，backend 換掉時才重新包
+    """
+    def decorator(fn):
+        bound = [None, None] # [backend, 包好的函式]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            backend, func = bound
+            if backend is not _backend:
+                backend = _backend
+                func = backend(ttl)(fn)
+                bound[:] = [backend, func]
+            return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,114 @@
+import math
+import numpy as np
+import pandas as pd
+import indicators
+
+# 畫面上最多顯示幾根 K 棒，超過就合併 (例如日 K 合成數日一根)
+# 合併後點數很少，均線用一般的 Scatter 即可，不需要 WebGL
+MAX_CANDLES = 400
+
+# 顯示範圍 (給 app.py 的選單使用)
+ZOOM_RANGES = {"近3月": 3, "近6月": 6, "近1年": 12, "近3年": 36, "全部": None}
+# 「全部」最多載入幾個月 (與 backfill_prices 預設的十年相同)
+FULL_HISTORY_MONTHS = 120
+
+# ==========================================
+# 1. 資料整理 (只做一次)
+# ==========================================
+def prepare_price_frame(df_price):
+    """
+    [圖表資料整理]
+    日期轉型、排序、計算 MA5 / MA20 與漲跌顏色 (整欄運算，不用 iterrows)
+    """
+    df_plot = df_price.copy()
+    df_plot['日期'] = pd.to_datetime(df_plot['日期'])
+    df_plot = df_plot.sort_values('日期').reset_index(drop=True)
+
+    # 計算移動平均線 (MA)，與其他指標共用同一套引擎
+    ma = indicators.compute(df_plot, {"ma": (5, 20)})
+    df_plot['MA5'], df_plot['MA20'] = ma['MA5'], ma['MA20']
+    # 設定顏色：漲紅跌綠 (台股習慣)
+    df_plot['顏色'] = np.where(df_plot['收盤價'] >= df_plot['開盤價'], 'red', 'green')
+    return df_plot
+
+def slice_range(df_plot, months=None):
+    """只留最近 N 個月 (None = 全部)"""
+    if months is None or df_plot.empty:
+        return df_plot
+    start = df_plot['日期'].iloc[-1] - pd.DateOffset(months=months)
+    return df_plot[df_plot['日期'] > start]
+
+def downsample_ohlc(df_plot, max_points=MAX_CANDLES):
+    """
+    點數太多時把相鄰的 K 棒合併 (開=第一天開、高=最高、低=最低、收=最後一天收、量=加總)
+    均線取每組最後一天的值 (均線是在合併前算的，所以數值不會失真)
+    """
+    if len(df_plot) <= max_points:
+        return df_plot
+    size = math.ceil(len(df_plot) / max_points)
+    groups = np.arange(len(df_plot)) // size
+    merged = df_plot.groupby(groups).agg({
+        '日期': 'first', '開盤價': 'first', '最高價': 'max', '最低價': 'min',
+        '收盤價': 'last', '成交股數': 'sum', 'MA5': 'last', 'MA20': 'last',
+    }).reset_index(drop=True)
+    merged['顏色'] = np.where(merged['收盤價'] >= merged['開盤價'], 'red', 'green')
+    return merged
+
+# ==========================================
+# 2. 建立圖表 (K 線 + 成交量，可選擇加上三大法人)
+# ==========================================
+def build_price_figure(df_plot, title, df_chips=None, chip_title="三大法人買賣超"):
+    """
+    [圖表建立]
+    一次建好整張圖；有 df_chips 時多一層籌碼圖
+    """
+    import plotly.graph_objects as go # 只有畫圖時才載入
+    from plotly.subplots import make_subplots
+
+    with_chips = df_chips is not None and not df_chips.empty
+    if with_chips:
+        fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                            row_heights=[0.5, 0.25, 0.25], # K線佔一半，剩下給成交量和籌碼
+                            subplot_titles=("股價走勢", "成交量", chip_title))
+    else:
+        # 建立雙軸圖表 (上面是 K 線，下面是成交量)
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_heights=[0.7, 0.3])
+
+    # --- 第一層：K 線圖 (漲紅跌綠) ---
+    fig.add_trace(go.Candlestick(
+        x=df_plot['日期'],
+        open=df_plot['開盤價'], high=df_plot['最高價'],
+        low=df_plot['最低價'], close=df_plot['收盤價'],
+        name='K線', increasing_line_color='red', decreasing_line_color='green'
+    ), row=1, col=1)
+
+    fig.add_trace(go.Scatter(x=df_plot['日期'], y=df_plot['MA5'], mode='lines', name='MA5 (週線)',
+                             line=dict(color='orange', width=1)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df_plot['日期'], y=df_plot['MA20'], mode='lines', name='MA20 (月線)',
+                             line=dict(color='blue', width=1)), row=1, col=1)
+
+    # --- 第二層：成交量 ---
+    fig.add_trace(go.Bar(x=df_plot['日期'], y=df_plot['成交股數'], name='成交量',
+                         marker_color=df_plot['顏色']), row=2, col=1)
+
+    # --- 第三層：籌碼 (買超紅、賣超綠) ---
+    if with_chips:
+        fig.add_trace(go.Bar(
+            x=df_chips['日期'],
+            y=df_chips['合計'],
+            name='法人買賣超',
+            marker_color=np.where(df_chips['合計'] > 0, 'red', 'green'),
+            # 滑鼠移上去可以看到細節
+            customdata=df_chips[['外資', '投信', '自營商']],
+            hovertemplate="<br>日期: %{x}<br>合計: %{y}<br>外資: %{customdata[0]}<br>投信: %{customdata[1]}<br>自營商: %{customdata[2]}"
+        ), row=3, col=1)
+
+    # --- 版面設定 ---
+    fig.update_layout(
+        title=title,
+        xaxis_rangeslider_visible=False, # 隱藏下方預設的滑桿
+        height=800 if with_chips else 600,
+        showlegend=True,
+        hovermode="x unified" # 滑鼠移過去顯示所有資訊
+    )
+    return fig
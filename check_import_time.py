@@ -0,0 +1,68 @@
+"""
+[核心模組匯入時間檢查]
+批次工作與排程只需要資料/分析模組，不應該因為匯入而載入整套網頁 UI
+每個模組在乾淨的 Python 行程中各自匯入，量測時間並確認沒有偷偷載入重量級套件
+
+使用方式：
+    python check_import_time.py               # 超過預算時回傳非 0
+    python check_import_time.py --budget 0.8
+    python -X importtime -c "import financial_data"   # 想看細節時
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CORE_MODULES = [
+    "http_client", "local_store", "trading_calendar", "price_store", "t86_store",
+    "chips_analysis", "company_master", "company_info", "competitor_analysis",
+    "financial_data", "fundamentals_cache", "translation_cache", "news_analyzer",
+    "report_generator", "load_orchestrator", "cache_utils", "chart_builder",
+    "indicators", "snapshot_loader", "replay", "telemetry",
+]
+
+# 這些只有 UI 或真的要抓資料時才需要
+HEAVY_MODULES = ["streamlit", "plotly", "yfinance", "deep_translator", "feedparser", "xlsxwriter"]
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module):
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                         capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if out.returncode != 0:
+        return {"module": module, "error": out.stderr.strip().splitlines()[-1] if out.stderr else "failed"}
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["module"] = module
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="核心模組匯入時間檢查")
+    parser.add_argument('--budget', type=float, default=1.0, help="單一模組匯入時間上限 (秒)")
+    parser.add_argument('--json', action='store_true', help="輸出 JSON")
+    args = parser.parse_args()
+
+    results = [measure(m) for m in CORE_MODULES]
+    failed = [r for r in results if 'error' in r or r['heavy'] or r['seconds'] > args.budget]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for r in results:
+            if 'error' in r:
+                print(f"❌ {r['module']:<20} 匯入失敗: {r['error']}")
+            else:
+                mark = "❌" if r in failed else "✅"
+                heavy = f"  載入了 {', '.join(r['heavy'])}" if r['heavy'] else ""
+                print(f"{mark} {r['module']:<20} {r['seconds'] * 1000:7.1f} ms{heavy}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,44 @@
-import requests
-import pandas as pd
-import time
+import itertools
+import t86_store
+import telemetry
+import trading_calendar
 
+def get_recent_trading_dates(days):
+    """
+    找出最近 N 個有 T86 資料的交易日 (由新到舊)
+    只詢問交易日曆上的交易日，週末與休市日完全不發請求
+    每天的全市場 T86 只下載一次存在本機，之後任何股票都直接查本機
+    """
+    trading_dates = []
+    # 多留幾天餘裕：今天可能還沒公布、或遇到臨時休市
+    for date_obj in itertools.islice(trading_calendar.iter_trading_days_back(), days + 5):
+        if len(trading_dates) >= days: # 抓滿 N 天就收工
+            break
+        if t86_store.ensure_day(date_obj): # 尚未公布或抓取失敗就跳過
+            trading_dates.append(date_obj)
+    return trading_dates
+
+@telemetry.timed("法人籌碼")
 def get_chips_data(stock_code, days=5):
     """
     [籌碼分析模組]
-    抓取個股最近 N 天的三大法人買賣超 (T86)
+    抓取最近 N 天的三大法人買賣超 (T86)
+    stock_code 為單一代號：回傳該股 (日期, 外資, 投信, 自營商, 合計)
+    stock_code 為代號清單：回傳長表 (日期, 證券代號, 外資, 投信, 自營商, 合計)
+    成本只跟天數有關，跟股票檔數無關
     """
-    print(f"🕵️‍♀️ 正在追蹤 {stock_code} 的主力籌碼 (近 {days} 天)...")
-    
-    # 產生最近的日期 (多抓幾天以防遇到假日)
-    date_range = pd.date_range(end=pd.Timestamp.now(), periods=days*3).tolist()
-    date_range.reverse() # 從最新的日期開始
-    
-    chips_data = []
-    success_count = 0
-    
-    for date_obj in date_range:
-        if success_count >= days: # 抓滿 N 天就收工
-            break
-            
-        date_str = date_obj.strftime("%Y%m%d")
-        url = f"https://www.twse.com.tw/rwd/zh/fund/T86?date={date_str}&selectType=ALL&response=json"
-        
-        try:
-            time.sleep(0.3) # 避免打太快
-            res = requests.get(url)
-            data = res.json()
-            
-            if data['stat'] == 'OK':
-                df_day = pd.DataFrame(data['data'], columns=data['fields'])
-                row = df_day[df_day['證券代號'] == stock_code]
-                
-                if not row.empty:
-                    # 處理千分位逗號
-                    def to_int(val): return int(val.replace(',', ''))
-                    
-                    chips_data.append({
-                        "日期": date_obj.strftime("%Y-%m-%d"),
-                        "外資": to_int(row.iloc[0]['外資自營商買賣超股數']),
-                        "投信": to_int(row.iloc[0]['投信買賣超股數']),
-                        "自營商": to_int(row.iloc[0]['自營商買賣超股數']),
-                        "合計": to_int(row.iloc[0]['三大法人買賣超股數'])
-                    })
-                    success_count += 1
-        except: pass
+    single = isinstance(stock_code, str)
+    codes = [stock_code] if single else [str(c) for c in stock_code]
+    label = stock_code if single else f"{len(codes)} 檔股票"
+    print(f"🕵️‍♀️ 正在追蹤 {label} 的主力籌碼 (近 {days} 天)...")
+
+    trading_dates = get_recent_trading_dates(days)
+    df = t86_store.load_rows(codes, trading_dates)
+    if df.empty:
+        return None
 
-    if chips_data:
-        return pd.DataFrame(chips_data).sort_values('日期')
-    else:
-        return None
\ No newline at end of file
+    df = df.rename(columns={'date': '日期', 'code': '證券代號'})
+    df = df.sort_values(['證券代號', '日期']).reset_index(drop=True)
+    if single:
+        return df.drop(columns=['證券代號'])
+    return df[['日期', '證券代號', '外資', '投信', '自營商', '合計']]
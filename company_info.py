@@ -1,28 +1,23 @@
-import requests
-import pandas as pd
-import yfinance as yf
-from deep_translator import GoogleTranslator
+import company_master
+import fundamentals_cache
+import telemetry
+import translation_cache
 
+@telemetry.timed("基本資料")
 def get_company_basic_info(stock_code):
     """
     [基本資料模組]
     整合 證交所 Open Data + Yahoo Finance
     回傳：包含詳細公司資訊的 Dictionary
     """
-    # 1. 抓取證交所詳細清單 (API: t187ap03_L)
-    url = "https://openapi.twse.com.tw/v1/opendata/t187ap03_L"
+    # 1. 查證交所公司主檔 (API: t187ap03_L，由 company_master 統一下載與索引)
     basic_info = {}
     
     try:
-        # 這裡不使用 verify=False，若報錯在主程式處理
-        res = requests.get(url, verify=False) 
-        df = pd.DataFrame(res.json())
+        # 以公司代號直接查索引
+        row = company_master.get_company(stock_code)
         
-        # 篩選這家公司
-        company = df[df['公司代號'] == stock_code]
-        
-        if not company.empty:
-            row = company.iloc[0]
+        if row is not None:
             # 將證交所的欄位一一填入
             basic_info['公司名稱'] = row.get('公司名稱', '')
             basic_info['產業別'] = row.get('產業別', '')
@@ -56,8 +51,9 @@ def get_company_basic_info(stock_code):
 
     # 2. 抓取 Yahoo Finance (補充簡介與英文名)
     try:
+        import yfinance as yf # 用到才載入，讓批次工作匯入本模組時很快
         ticker = yf.Ticker(f"{stock_code}.TW")
-        yf_info = ticker.info
+        yf_info = fundamentals_cache.get(f"{stock_code}.TW", "info", lambda: ticker.info) # 與財報模組共用快取
         
         # 如果證交所沒抓到，嘗試用 Yahoo 補
         if '公司名稱' not in basic_info:
@@ -70,8 +66,8 @@ def get_company_basic_info(stock_code):
         summary = yf_info.get('longBusinessSummary', '暫無詳細描述')
         if summary != '暫無詳細描述' and len(summary) > 10:
             try:
-                # 限制字數翻譯
-                summary_zh = GoogleTranslator(source='auto', target='zh-TW').translate(summary[:4000])
+                # 限制字數翻譯 (原文沒變就直接用本機翻譯快取)
+                summary_zh = translation_cache.translate(summary[:4000], target='zh-TW')
                 basic_info['公司簡介'] = summary_zh
             except:
                 basic_info['公司簡介'] = summary # 翻譯失敗顯示原文
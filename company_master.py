@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+import pandas as pd
+import http_client
+import local_store
+
+URL = "https://openapi.twse.com.tw/v1/opendata/t187ap03_L"
+REFRESH_SECONDS = 86400 # 上市公司基本資料一天更新一次就夠
+RETRY_SECONDS = 300 # 下載失敗後隔多久再試 (這段期間先用舊資料，查詢不用排隊等連線逾時)
+SNAPSHOT_FILE = "company_master.json"
+
+# ==========================================
+# 公司主檔 (整個程式共用一份)
+# ==========================================
+_lock = threading.Lock()
+_state = {"loaded_at": 0, "rows": [], "by_code": {}, "by_industry": {}}
+
+def _snapshot_path():
+    return os.path.join(local_store.DATA_DIR, SNAPSHOT_FILE)
+
+def _build_index(rows, loaded_at):
+    """建立 公司代號 -> 資料、產業別 -> [資料] 兩個索引"""
+    by_code, by_industry = {}, {}
+    for row in rows:
+        code = str(row.get('公司代號', '')).strip()
+        by_code[code] = row
+        by_industry.setdefault(row.get('產業別', ''), []).append(row)
+    _state.update(loaded_at=loaded_at, rows=rows, by_code=by_code, by_industry=by_industry)
+
+def _download():
+    res = http_client.get(URL, verify=False)
+    return res.json()
+
+def refresh(force=False):
+    """
+    [公司主檔]
+    t187ap03_L 只在過期時下載一次，同時存一份到 data/ 讓重新啟動後不用再抓
+    下載失敗時沿用舊資料，RETRY_SECONDS 之後才再試
+    """
+    with _lock:
+        now = time.time()
+        if not force and now - _state["loaded_at"] < REFRESH_SECONDS:
+            return
+
+        # 程式剛啟動：先看本機存檔是否還新鮮
+        path = _snapshot_path()
+        if not force and not _state["rows"] and os.path.exists(path) and now - os.path.getmtime(path) < REFRESH_SECONDS:
+            with open(path, encoding='utf-8') as f:
+                _build_index(json.load(f), os.path.getmtime(path))
+            return
+
+        try:
+            rows = _download()
+        except Exception as e:
+            print(f"證交所公司主檔抓取失敗: {e}")
+            retry_at = now - REFRESH_SECONDS + RETRY_SECONDS # 視為「快要過期」，稍後才再下載
+            if not _state["rows"] and os.path.exists(path): # 過期的存檔總比沒有好
+                with open(path, encoding='utf-8') as f:
+                    _build_index(json.load(f), retry_at)
+            else:
+                _state["loaded_at"] = retry_at
+            return
+
+        _build_index(rows, now)
+        os.makedirs(local_store.DATA_DIR, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False)
+
+def get_company(stock_code):
+    """以公司代號查詢 (記憶體內 O(1))；查無資料回傳 None"""
+    refresh()
+    return _state["by_code"].get(str(stock_code).strip())
+
+def get_industry_companies(industry):
+    """回傳某產業的所有公司資料"""
+    refresh()
+    return list(_state["by_industry"].get(industry, []))
+
+def get_industry_table():
+    """回傳 (公司代號, 公司名稱, 產業別) 對照表"""
+    refresh()
+    df = pd.DataFrame(_state["rows"])
+    if df.empty:
+        return df
+    return df[['公司代號', '公司名稱', '產業別']]
@@ -1,19 +1,29 @@
-import requests
+import threading
+import time
+import numpy as np
+import http_client
+import company_master
+import snapshot_loader
+import telemetry
 import pandas as pd
-import streamlit as st
+from cache_utils import cached
 
 # ==========================================
 # 1. 抓取大盤個股數據 (只抓數據，不抓名稱)
 # ==========================================
-@st.cache_data(ttl=3600)
+@cached(ttl=3600)
 def get_market_stats():
     """
     從證交所抓取：本益比、殖利率、股價淨值比
     API: BWIBBU_ALL
+    離線模式或連線失敗時改讀本機快照 (market_fundamentals_*.csv)，
+    這時 df.attrs['snapshot_date'] 是快照日期，畫面上要標示「不是即時資料」
     """
+    if snapshot_loader.OFFLINE:
+        return snapshot_loader.market_stats()
     url = "https://openapi.twse.com.tw/v1/exchangeReport/BWIBBU_ALL"
     try:
-        res = requests.get(url, verify=False)
+        res = http_client.get(url, verify=False)
         data = res.json()
         df = pd.DataFrame(data)
         
@@ -40,95 +50,108 @@ def get_market_stats():
             
         return df
     except Exception as e:
-        print(f"同業資料抓取失敗: {e}")
-        return pd.DataFrame()
+        print(f"同業資料抓取失敗: {e}，改用本機快照")
+        return snapshot_loader.market_stats()
 
 # ==========================================
 # 2. 抓取產業分類表 (名稱以此為準)
 # ==========================================
-@st.cache_data(ttl=86400)
 def get_industry_map():
     """
     抓取「股票代號」對應「產業別」
-    API: T187AP03_L
+    API: T187AP03_L (與 company_info 共用 company_master，只下載一次)
     """
-    url = "https://openapi.twse.com.tw/v1/opendata/t187ap03_L"
     try:
-        res = requests.get(url, verify=False)
-        data = res.json()
-        df = pd.DataFrame(data)
-        
         # 這裡有我們要的 '公司名稱'
-        return df[['公司代號', '公司名稱', '產業別']]
+        return company_master.get_industry_table()
     except:
         return pd.DataFrame()
 
 # ==========================================
-# 3. 核心功能：產生同業比較表
+# 3. 同業索引 (每次資料更新只建一次)
 # ==========================================
-def get_peers_comparison(target_code, target_industry):
+PEER_COLUMNS = ['證券代號', '公司名稱', '本益比', '殖利率(%)', '股價淨值比']
+INDEX_TTL = 3600 # 與 get_market_stats 的快取時間相同
+
+# 各指標的有效範圍：過濾異常值 (本益比太高或太低的) 讓圖表好看一點
+METRIC_FILTERS = {
+    '本益比': lambda s: (s > 0) & (s < 200),
+    '股價淨值比': lambda s: s > 0,
+    '殖利率(%)': lambda s: s >= 0,
+}
+
+class PeerIndex:
     """
-    輸入：目標股票代號、產業
-    輸出：該產業的同業比較表 (DataFrame)
+    [同業索引]
+    把「大盤數據 + 產業分類」合併一次，依產業分組，
+    每個產業各自依 本益比 / 股價淨值比 / 殖利率 預先排序好
+    查詢時用二分搜尋找到目標位置，直接取前後 k 檔
     """
-    # 1. 取得數據
-    df_stats = get_market_stats()    # 有：證券代號, 本益比...
-    df_industry = get_industry_map() # 有：公司代號, 公司名稱, 產業別
-    
-    if df_stats.empty or df_industry.empty:
-        return None
 
-    # 2. 合併資料
-    # 使用 inner join，這樣合併後就會有：
-    # [證券代號, 本益比..., 公司名稱, 產業別]
-    # 因為 df_stats 裡沒有 '公司名稱'，所以不會產生 _x, _y 的衝突
-    df_merged = pd.merge(
-        df_stats, 
-        df_industry, 
-        left_on='證券代號', 
-        right_on='公司代號', 
-        how='inner'
-    )
-    
-    # 3. 篩選同產業
-    df_peers = df_merged[df_merged['產業別'] == target_industry].copy()
-    
-    if df_peers.empty:
-        return None
+    def __init__(self, df_merged, snapshot_date=None):
+        self.snapshot_date = snapshot_date # 大盤數據來自本機快照時的日期 (即時資料為 None)
+        self.rows = df_merged.drop_duplicates('證券代號').set_index('證券代號', drop=False)[PEER_COLUMNS + ['產業別']]
+        self.sorted = {} # (產業, 指標) -> (排序後的表, 數值陣列, 代號 -> 位置)
+        for industry, group in self.rows.groupby('產業別'):
+            for metric, is_valid in METRIC_FILTERS.items():
+                ranked = group[is_valid(group[metric])].sort_values(metric, kind='mergesort').reset_index(drop=True)
+                positions = {code: i for i, code in enumerate(ranked['證券代號'])}
+                self.sorted[(industry, metric)] = (ranked[PEER_COLUMNS], ranked[metric].to_numpy(), positions)
 
-    # 4. 確保目標股票在裡面 (防呆)
-    if target_code not in df_peers['證券代號'].values:
-        # 有時候目標股票可能因為本益比是負的被證交所標記異常，或者資料沒對上
-        # 我們嘗試從 df_merged 裡硬抓出來補進去
-        target_row = df_merged[df_merged['證券代號'] == target_code]
-        if not target_row.empty:
-            df_peers = pd.concat([df_peers, target_row])
-        else:
-            return None # 真的找不到這支股票
+    def nearest(self, target_code, industry, k=4, by='本益比'):
+        """回傳同產業中 by 指標最接近目標的前後各 k 檔 (含目標本身)"""
+        if (industry, by) not in self.sorted or target_code not in self.rows.index:
+            return None
+        ranked, values, positions = self.sorted[(industry, by)]
 
-    # 5. 排序與取樣
-    # 過濾異常值 (本益比太高或太低的) 讓圖表好看一點
-    df_clean = df_peers[(df_peers['本益比'] > 0) & (df_peers['本益比'] < 200)].sort_values('本益比')
-    
-    # 如果過濾後目標股票不見了，把它救回來
-    if target_code not in df_clean['證券代號'].values:
-        target_row = df_peers[df_peers['證券代號'] == target_code]
-        df_clean = pd.concat([df_clean, target_row])
+        if target_code in positions:
+            pos = positions[target_code]
+            return ranked.iloc[max(0, pos - k):min(len(ranked), pos + k + 1)]
 
-    # 重新排序
-    df_clean = df_clean.sort_values('本益比').reset_index(drop=True)
-    
-    # 取出目標股票附近的同業 (前後各 4 名)
-    try:
-        idx_list = df_clean.index[df_clean['證券代號'] == target_code].tolist()
-        if idx_list:
-            target_idx = idx_list[0]
-            start = max(0, target_idx - 4)
-            end = min(len(df_clean), target_idx + 5)
-            final_df = df_clean.iloc[start:end]
-        else:
-            final_df = df_clean.head(9)
-    except:
-        final_df = df_clean.head(9)
+        # 目標不在有效範圍 (例如本益比為負被標記異常) 或不在這個產業：把它插在排序位置上
+        target_row = self.rows.loc[[target_code], PEER_COLUMNS]
+        pos = int(np.searchsorted(values, target_row[by].iloc[0])) if pd.notna(target_row[by].iloc[0]) else len(values)
+        return pd.concat([ranked.iloc[max(0, pos - k):pos], target_row, ranked.iloc[pos:pos + k]], ignore_index=True)
+
+_index_lock = threading.Lock()
+_index_state = {"built_at": 0, "index": None}
+
+def get_peer_index():
+    """取得同業索引；超過 INDEX_TTL 才重新合併、重建"""
+    with _index_lock:
+        rebuild = _index_state["index"] is None or time.time() - _index_state["built_at"] > INDEX_TTL
+        telemetry.annotate(cache='miss' if rebuild else 'hit')
+        if rebuild:
+            df_stats = get_market_stats()    # 有：證券代號, 本益比...
+            df_industry = get_industry_map() # 有：公司代號, 公司名稱, 產業別
+            if df_stats.empty or df_industry.empty:
+                return None
+
+            # 使用 inner join，合併後就會有：[證券代號, 本益比..., 公司名稱, 產業別]
+            # 因為 df_stats 裡沒有 '公司名稱'，所以不會產生 _x, _y 的衝突
+            df_merged = pd.merge(df_stats, df_industry, left_on='證券代號', right_on='公司代號', how='inner')
+            _index_state.update(built_at=time.time(),
+                                index=PeerIndex(df_merged, df_stats.attrs.get('snapshot_date')))
+        return _index_state["index"]
+
+# ==========================================
+# 4. 核心功能：產生同業比較表
+# ==========================================
+@telemetry.timed("同業比較")
+def get_peers_comparison(target_code, target_industry, k=4, by='本益比'):
+    """
+    輸入：目標股票代號、產業
+    輸出：該產業中 by 指標 (預設本益比) 最接近目標的前後各 k 檔 (DataFrame)
+    by 也可以是 '股價淨值比' 或 '殖利率(%)'
+    數據來自本機快照時，df.attrs['snapshot_date'] 是快照日期
+    """
+    index = get_peer_index()
+    if index is None:
+        return None
 
-    return final_df[['證券代號', '公司名稱', '本益比', '殖利率(%)', '股價淨值比']]
\ No newline at end of file
+    final_df = index.nearest(target_code, target_industry, k=k, by=by)
+    if final_df is None or final_df.empty:
+        return None # 真的找不到這支股票或這個產業
+    final_df = final_df.reset_index(drop=True)
+    final_df.attrs['snapshot_date'] = index.snapshot_date
+    return final_df
@@ -1,5 +1,7 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
+import fundamentals_cache
+import telemetry
 
 # ==========================================
 # 您的客製化業界標準 (Benchmark)
@@ -25,165 +27,219 @@ def check_benchmark(name, value, criteria, higher_is_better=True):
         elif value <= criteria["中位數"]: return f"🟢 **【標準】{name}安全**：僅 {value}% (優於中位數 {criteria['中位數']}%)。"
         else: return f"⚪ **【標準】{name}尚可**：{value}% (介於中位數與警戒線之間)。"
 
-# --- 輔助函式 2: 計算得分 ---
-def get_score_and_comment(value, criteria, higher_is_better=True):
-    score = 0
-    comment = ""
+# --- 輔助函式 2: 計算得分 (整欄一次分級) ---
+# 分級代號：0 危險 / 1 注意 / 2 普通 / 3 優良
+BUCKET_SCORES = np.array([0, 10, 15, 20])
+BUCKET_COMMENTS = np.array(["危險", "注意", "普通", "優良"])
+
+def bucket_benchmark(values, criteria, higher_is_better=True):
+    """
+    把一整欄數值依 BENCHMARKS 分級 (判斷順序與 check_benchmark 相同)
+    回傳：分級代號陣列
+    """
+    v = np.asarray(values, dtype=float)
     if higher_is_better:
-        if value < criteria["高風險"]: score = 0; comment = "危險"
-        elif value < criteria["偏低注意"]: score = 10; comment = "注意"
-        elif value >= criteria["中位數"]: score = 20; comment = "優良"
-        else: score = 15; comment = "普通"
+        conds = [v < criteria["高風險"], v < criteria["偏低注意"], v >= criteria["中位數"]]
     else:
-        if value > criteria["高風險"]: score = 0; comment = "危險"
-        elif value > criteria["偏高注意"]: score = 10; comment = "注意"
-        elif value <= criteria["中位數"]: score = 20; comment = "優良"
-        else: score = 15; comment = "普通"
-    return score, comment
+        conds = [v > criteria["高風險"], v > criteria["偏高注意"], v <= criteria["中位數"]]
+    return np.select(conds, [0, 1, 3], default=2)
+
+def get_score_and_comment(values, criteria, higher_is_better=True):
+    """回傳 (得分陣列, 評語陣列)"""
+    bucket = bucket_benchmark(values, criteria, higher_is_better)
+    return BUCKET_SCORES[bucket], BUCKET_COMMENTS[bucket]
+
+# ==========================================
+# 比率計算引擎 (所有期間 / 所有公司一次算完)
+# ==========================================
+# 財報科目對照：欄位名稱 -> Yahoo 科目名稱
+FIN_ITEMS = {'rev': 'Total Revenue', 'net_income': 'Net Income', 'op_income': 'Operating Income',
+             'cost': 'Cost Of Revenue', 'ebit': 'EBIT'}
+BS_ITEMS = {'total_assets': 'Total Assets', 'total_liab': 'Total Liabilities Net Minority Interest',
+            'curr_assets': 'Current Assets', 'curr_liab': 'Current Liabilities',
+            'stockholder_equity': 'Stockholders Equity', 'retained_earnings': 'Retained Earnings'}
+CF_ITEMS = {'ocf': 'Operating Cash Flow', 'capex': 'Capital Expenditure'}
+
+# 評分項目：(名稱, 比率欄位, 越高越好?)
+SCORE_ITEMS = [
+    ("毛利率", '毛利率 (%)', True),
+    ("營業利益率", '營業利益率 (%)', True),
+    ("淨利率", '淨利率 (%)', True),
+    ("流動比率", '流動比率 (%)', True),
+    ("負債比率", '負債比率 (%)', False),
+]
+
+def _pick_items(df, mapping, periods):
+    """取出指定科目 (列) 與期間 (欄)，轉成 期間 x 欄位；缺少的科目補 0"""
+    out = df.reindex(index=list(mapping.values()), columns=periods).astype(float)
+    missing = [item for item in mapping.values() if item not in df.index]
+    out.loc[missing] = 0
+    out.index = list(mapping.keys())
+    return out.T
+
+def statement_items(fin, bs, cf, market_cap, periods):
+    """把 Yahoo 三大報表整理成一張「期間 x 科目」的表"""
+    items = pd.concat([
+        _pick_items(fin, FIN_ITEMS, periods),
+        _pick_items(bs, BS_ITEMS, periods),
+        _pick_items(cf, CF_ITEMS, periods),
+    ], axis=1)
+    if 'EBIT' not in fin.index:
+        items['ebit'] = items['op_income']
+    items['market_cap'] = market_cap
+    return items
+
+def _div(a, b, default=0):
+    """a / b，分母為 0 時給預設值 (分母缺值時維持缺值)"""
+    return (a / b).where(b != 0, default)
+
+def compute_ratios(items):
+    """
+    [比率引擎]
+    輸入：statement_items 的表 (可以是一家公司多期，也可以是上千家公司堆疊)
+    回傳：同樣索引的比率表 (已四捨五入到小數 2 位)
+    """
+    rev, net_income, total_assets = items['rev'], items['net_income'], items['total_assets']
+    total_liab, equity = items['total_liab'], items['stockholder_equity']
+    capex = items['capex'].abs()
+    fcf = items['ocf'] - capex
+    working_capital = items['curr_assets'] - items['curr_liab']
+
+    # [Z-Score 計算] 總資產、總負債都大於 0 才計算；若無市值數據則忽略 D 項
+    A = working_capital / total_assets
+    B = items['retained_earnings'] / total_assets
+    C = items['ebit'] / total_assets
+    D = (items['market_cap'] / total_liab).where(items['market_cap'] > 0, 0)
+    E = rev / total_assets
+    z_score = (1.2*A + 1.4*B + 3.3*C + 0.6*D + 1.0*E).where((total_assets > 0) & (total_liab > 0), 0)
+
+    ratios = pd.DataFrame({
+        "毛利率 (%)": _div(rev - items['cost'], rev) * 100,
+        "營業利益率 (%)": _div(items['op_income'], rev) * 100,
+        "淨利率 (%)": _div(net_income, rev) * 100,
+        "ROE (%)": _div(net_income, equity) * 100,
+        "流動比率 (%)": _div(items['curr_assets'], items['curr_liab']) * 100,
+        "負債比率 (%)": _div(total_liab, total_assets) * 100,
+        "現金流對淨利比 (%)": _div(items['ocf'], net_income) * 100,
+        "Z-Score": z_score,
+        "自由現金流 (億)": fcf / 100000000,
+        "資產周轉率 (次)": _div(rev, total_assets),
+        "權益乘數 (倍)": _div(total_assets, equity, default=1),
+    }, index=items.index)
+    return ratios.round(2)
+
+def score_ratios(ratios):
+    """
+    [評分引擎]
+    對比率表的每一列 (每家公司每一期) 一次算出五力得分、總分、評級、Z-Score 狀態
+    """
+    scores = pd.DataFrame(index=ratios.index)
+    for name, col, higher in SCORE_ITEMS:
+        s, c = get_score_and_comment(ratios[col], BENCHMARKS[name], higher)
+        scores[f"{name}得分"] = s
+        scores[f"{name}評語"] = c
+
+    total = scores[[f"{name}得分" for name, _, _ in SCORE_ITEMS]].sum(axis=1)
+    scores["總分"] = total
+    scores["評級"] = np.select(
+        [total >= 90, total >= 80, total >= 70, total >= 60],
+        ["AAA (極優)", "AA (優異)", "A (良好)", "B (尚可)"], default="C (高風險)")
+
+    z = ratios['Z-Score']
+    scores["Z-Score"] = z
+    scores["Z-Status"] = np.select([z > 2.99, z > 1.81], ["安全區 (Safe)", "灰色警示 (Grey)"], default="破產高險 (Distress)")
+    return scores
+
+# ==========================================
+# 抓取 Yahoo 財報
+# ==========================================
+def fetch_statements(stock_code, refresh=False):
+    """
+    從 Yahoo 抓損益表、資產負債表、現金流量表與市值
+    先查本機財報快取 (fundamentals_cache)，過期或 refresh=True 才真的上網
+    回傳：(fin, bs, cf, market_cap)
+    損益表或資產負債表回傳空資料 (多半是被限流) 時丟出 fundamentals_cache.EmptyResponse，
+    讓呼叫端當成暫時性錯誤稍後重試，不要當成「資料不足」
+    """
+    import yfinance as yf # 用到才載入 (只算比率、評分時不需要)
+    symbol = f"{stock_code}.TW"
+    ticker = yf.Ticker(symbol) # 建立物件本身不會連線
+
+    fin = fundamentals_cache.get(symbol, "financials", lambda: ticker.financials, refresh)
+    bs = fundamentals_cache.get(symbol, "balance_sheet", lambda: ticker.balance_sheet, refresh)
+    try:
+        cf = fundamentals_cache.get(symbol, "cashflow", lambda: ticker.cashflow, refresh)
+    except fundamentals_cache.EmptyResponse:
+        cf = pd.DataFrame() # 現金流量表缺了只影響 FCF，其他比率照算
+
+    # 嘗試抓取市值 (如果抓不到就給 0，避免報錯)
+    try:
+        info = fundamentals_cache.get(symbol, "info", lambda: ticker.info, refresh)
+        market_cap = info.get('marketCap', 0) or 0
+    except:
+        market_cap = 0
+    return fin, bs, cf, market_cap
+
+def get_statement_items(stock_code, periods=3, refresh=False):
+    """
+    抓財報並整理成「期間 x 科目」表 (批次評分用)；資料不足回傳 None
+    被限流等暫時性錯誤會丟出例外 (批次會記成可重試的錯誤)
+    """
+    fin, bs, cf, market_cap = fetch_statements(stock_code, refresh)
+    if fin.empty or bs.empty: return None
+    return statement_items(fin, bs, cf, market_cap, fin.columns[:periods])
 
 # --- 主程式 ---
-def get_comprehensive_analysis(stock_code):
+@telemetry.timed("財報分析")
+def get_comprehensive_analysis(stock_code, refresh=False):
     """
     [財報分析模組 - 銀行徵信修復版]
     包含 Z-Score, FCF, 杜邦分析, 信用評分
+    refresh=True：略過本機財報快取，重新向 Yahoo 抓取
     """
-    ticker = yf.Ticker(f"{stock_code}.TW")
     try:
-        fin = ticker.financials
-        bs = ticker.balance_sheet
-        cf = ticker.cashflow
-        
-        # 嘗試抓取市值 (如果抓不到就給 0，避免報錯)
-        try:
-            info = ticker.info
-            market_cap = info.get('marketCap', 0)
-        except:
-            market_cap = 0
+        fin, bs, cf, market_cap = fetch_statements(stock_code, refresh)
 
         if fin.empty or bs.empty: return None, [], None
 
-        data_list = []
         insights = []
         years = fin.columns[:3]
-        
-        for date in years:
-            year_str = str(date.year)
-            
-            # 1. 提取基礎數據 (使用 .get 避免缺值報錯)
-            def get_val(df, key):
-                return df.loc[key, date] if key in df.index else 0
-            
-            rev = get_val(fin, 'Total Revenue')
-            net_income = get_val(fin, 'Net Income')
-            op_income = get_val(fin, 'Operating Income')
-            cost = get_val(fin, 'Cost Of Revenue')
-            ebit = get_val(fin, 'EBIT') if 'EBIT' in fin.index else op_income
-            
-            total_assets = get_val(bs, 'Total Assets')
-            total_liab = get_val(bs, 'Total Liabilities Net Minority Interest')
-            curr_assets = get_val(bs, 'Current Assets')
-            curr_liab = get_val(bs, 'Current Liabilities')
-            stockholder_equity = get_val(bs, 'Stockholders Equity')
-            retained_earnings = get_val(bs, 'Retained Earnings')
-            
-            ocf = get_val(cf, 'Operating Cash Flow')
-            capex = abs(get_val(cf, 'Capital Expenditure'))
-            
-            # 2. 先計算所有公式 (避免變數未定義)
-            gross_margin = ((rev - cost) / rev * 100) if rev else 0
-            op_margin = op_income / rev * 100 if rev else 0
-            net_margin = net_income / rev * 100 if rev else 0
-            roe = net_income / stockholder_equity * 100 if stockholder_equity else 0
-            curr_ratio = curr_assets / curr_liab * 100 if curr_liab else 0
-            debt_ratio = total_liab / total_assets * 100 if total_assets else 0
-            quality_ratio = ocf / net_income * 100 if net_income else 0
-            
-            # [進階指標計算]
-            fcf = ocf - capex
-            asset_turnover = rev / total_assets if total_assets else 0
-            leverage = total_assets / stockholder_equity if stockholder_equity else 1
-            working_capital = curr_assets - curr_liab
-            
-            # [Z-Score 計算]
-            z_score = 0
-            if total_assets > 0 and total_liab > 0:
-                A = working_capital / total_assets
-                B = retained_earnings / total_assets
-                C = ebit / total_assets
-                D = market_cap / total_liab if market_cap > 0 else 0 # 若無市值數據則忽略此項
-                E = rev / total_assets
-                z_score = 1.2*A + 1.4*B + 3.3*C + 0.6*D + 1.0*E
-
-            # 3. 存入表格 (這裡就不會缺欄位了)
-            data_list.append({
-                "期間": f"{year_str}",
-                "毛利率 (%)": round(gross_margin, 2),
-                "營業利益率 (%)": round(op_margin, 2),
-                "淨利率 (%)": round(net_margin, 2),
-                "ROE (%)": round(roe, 2),
-                "流動比率 (%)": round(curr_ratio, 2),
-                "負債比率 (%)": round(debt_ratio, 2),
-                "現金流對淨利比 (%)": round(quality_ratio, 2),
-                # 新增欄位
-                "Z-Score": round(z_score, 2),
-                "自由現金流 (億)": round(fcf / 100000000, 2),
-                "資產周轉率 (次)": round(asset_turnover, 2),
-                "權益乘數 (倍)": round(leverage, 2),
-                "資料來源": f"https://tw.stock.yahoo.com/quote/{stock_code}.TW/financials"
-            })
-
-        df_result = pd.DataFrame(data_list)
+
+        # 1~2. 所有期間一次算完
+        ratios = compute_ratios(statement_items(fin, bs, cf, market_cap, years))
+
+        # 3. 存入表格
+        df_result = ratios.copy()
+        df_result.insert(0, "期間", [str(date.year) for date in years])
+        df_result["資料來源"] = f"https://tw.stock.yahoo.com/quote/{stock_code}.TW/financials"
+        df_result = df_result.reset_index(drop=True)
         score_details = {} 
         
         # 4. 產生解讀與評分
-        if len(data_list) >= 1:
-            latest = data_list[0]
+        if len(df_result) >= 1:
+            latest = df_result.iloc[0]
             
             # 趨勢分析
-            if len(data_list) >= 2:
-                prev = data_list[1]
+            if len(df_result) >= 2:
+                prev = df_result.iloc[1]
                 diff_gross = latest['毛利率 (%)'] - prev['毛利率 (%)']
                 if diff_gross > 1: insights.append(f"📈 **【趨勢】毛利率改善**：+{diff_gross:.2f}%")
                 elif diff_gross < -1: insights.append(f"📉 **【趨勢】毛利率衰退**：{diff_gross:.2f}%")
 
             # 業界標準解讀
-            insights.append(check_benchmark("毛利率", latest['毛利率 (%)'], BENCHMARKS["毛利率"], True))
-            insights.append(check_benchmark("營業利益率", latest['營業利益率 (%)'], BENCHMARKS["營業利益率"], True))
-            insights.append(check_benchmark("淨利率", latest['淨利率 (%)'], BENCHMARKS["淨利率"], True))
-            insights.append(check_benchmark("流動比率", latest['流動比率 (%)'], BENCHMARKS["流動比率"], True))
-            insights.append(check_benchmark("負債比率", latest['負債比率 (%)'], BENCHMARKS["負債比率"], False))
-
-            # 信用評分計算
-            s1, c1 = get_score_and_comment(latest['毛利率 (%)'], BENCHMARKS["毛利率"], True)
-            s2, c2 = get_score_and_comment(latest['營業利益率 (%)'], BENCHMARKS["營業利益率"], True)
-            s3, c3 = get_score_and_comment(latest['淨利率 (%)'], BENCHMARKS["淨利率"], True)
-            s4, c4 = get_score_and_comment(latest['流動比率 (%)'], BENCHMARKS["流動比率"], True)
-            s5, c5 = get_score_and_comment(latest['負債比率 (%)'], BENCHMARKS["負債比率"], False)
-            
-            total_score = s1 + s2 + s3 + s4 + s5
-            if total_score >= 90: grade = "AAA (極優)"
-            elif total_score >= 80: grade = "AA (優異)"
-            elif total_score >= 70: grade = "A (良好)"
-            elif total_score >= 60: grade = "B (尚可)"
-            else: grade = "C (高風險)"
-
-            # Z-Score 狀態
-            z = latest['Z-Score']
-            if z > 2.99: z_status = "安全區 (Safe)"
-            elif z > 1.81: z_status = "灰色警示 (Grey)"
-            else: z_status = "破產高險 (Distress)"
+            for name, col, higher in SCORE_ITEMS:
+                insights.append(check_benchmark(name, latest[col], BENCHMARKS[name], higher))
 
+            # 信用評分計算 (與批次評分共用同一個引擎)
+            score = score_ratios(ratios.iloc[[0]]).iloc[0]
             score_details = {
-                "總分": total_score,
-                "評級": grade,
-                "Z-Score": z,
-                "Z-Status": z_status,
+                "總分": int(score["總分"]),
+                "評級": score["評級"],
+                "Z-Score": float(score["Z-Score"]),
+                "Z-Status": score["Z-Status"],
                 "細項": [
-                    {"項目": "毛利率", "數值": latest['毛利率 (%)'], "評語": c1, "得分": s1},
-                    {"項目": "營業利益率", "數值": latest['營業利益率 (%)'], "評語": c2, "得分": s2},
-                    {"項目": "淨利率", "數值": latest['淨利率 (%)'], "評語": c3, "得分": s3},
-                    {"項目": "流動比率", "數值": latest['流動比率 (%)'], "評語": c4, "得分": s4},
-                    {"項目": "負債比率", "數值": latest['負債比率 (%)'], "評語": c5, "得分": s5},
+                    {"項目": name, "數值": float(latest[col]), "評語": score[f"{name}評語"], "得分": int(score[f"{name}得分"])}
+                    for name, col, _ in SCORE_ITEMS
                 ]
             }
 
@@ -191,4 +247,4 @@ def get_comprehensive_analysis(stock_code):
         
     except Exception as e:
         print(f"Analysis Error: {e}")
-        return None, [], None
\ No newline at end of file
+        return None, [], None
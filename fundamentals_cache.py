@@ -0,0 +1,94 @@
+import pickle
+import pandas as pd
+import local_store
+import replay
+import telemetry
+
+DB_NAME = "fundamentals.sqlite"
+
+# 各類資料的有效期限：年報一年只變幾次；info 裡有市值，一天更新一次即可
+TTL = {
+    "financials": pd.Timedelta(days=30),
+    "balance_sheet": pd.Timedelta(days=30),
+    "cashflow": pd.Timedelta(days=30),
+    "info": pd.Timedelta(days=1),
+}
+DEFAULT_TTL = pd.Timedelta(days=30)
+
+class EmptyResponse(LookupError):
+    """Yahoo 回傳空資料、本機也沒有快取 (多半是被限流，稍後重試通常就有)"""
+
+def _connect():
+    conn = local_store.connect(DB_NAME)
+    conn.execute("CREATE TABLE IF NOT EXISTS statements (ticker TEXT, kind TEXT, payload BLOB, fetched_at TEXT, PRIMARY KEY (ticker, kind))")
+    return conn
+
+def _is_empty(value):
+    if value is None:
+        return True
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    return not value
+
+def load(ticker, kind):
+    """回傳 (資料, 抓取時間)；沒有快取回傳 (None, None)"""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT payload, fetched_at FROM statements WHERE ticker = ? AND kind = ?", (ticker, kind)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None, None
+    return pickle.loads(row[0]), pd.Timestamp(row[1])
+
+def save(ticker, kind, value):
+    """存入快取，回傳存了多少 bytes"""
+    payload = pickle.dumps(value)
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO statements VALUES (?, ?, ?, ?)",
+                         (ticker, kind, payload, pd.Timestamp.now().isoformat()))
+    finally:
+        conn.close()
+    return len(payload)
+
+def get(ticker, kind, fetch_fn, refresh=False):
+    """
+    [財報快取]
+    以 (ticker, 報表種類) 為 key 存在本機；未過期就直接回傳，不打 Yahoo
+    refresh=True 強制重抓；重抓失敗或拿到空資料時，退回使用舊的快取
+    拿到空資料又沒有舊快取時丟出 EmptyResponse (不把限流誤當成「沒有這份報表」)
+    """
+    with telemetry.span(f"yahoo {kind}", kind="fetch", ticker=ticker) as s:
+        cached, fetched_at = load(ticker, kind)
+        ttl = TTL.get(kind, DEFAULT_TTL)
+        if not refresh and cached is not None and pd.Timestamp.now() - fetched_at < ttl:
+            s.set(cache='hit')
+            return cached
+
+        try:
+            value = replay.call("yfinance", (ticker, kind), fetch_fn) # 錄製 / 重播模式下改走 fixtures
+        except Exception as e:
+            if cached is None:
+                raise
+            print(f"   ⚠️ {ticker} {kind} 重抓失敗，使用舊資料: {e}")
+            s.set(cache='stale', error=f"{type(e).__name__}: {e}")
+            return cached
+
+        if _is_empty(value): # 被限流時 Yahoo 常回傳空表，不要把空表存起來
+            s.set(cache='stale' if cached is not None else 'miss', error="空資料")
+            if cached is None:
+                raise EmptyResponse(f"{ticker} {kind} 回傳空資料")
+            return cached
+        s.set(cache='miss', bytes=save(ticker, kind, value))
+        return value
+
+def invalidate(ticker):
+    """刪掉某檔股票的所有快取 (下次會重新抓)"""
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("DELETE FROM statements WHERE ticker = ?", (ticker,))
+    finally:
+        conn.close()
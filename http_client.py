@@ -0,0 +1,137 @@
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+import replay
+import telemetry
+
+# 忽略 SSL 警告 (部分證交所 API 需要 verify=False)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+DEFAULT_TIMEOUT = 15
+
+# ==========================================
+# 1. 每個網域的速率限制 (每秒幾次, 最多可以連發幾次)
+# ==========================================
+RATE_LIMITS = {
+    "twse.com.tw": (2.0, 3),          # www.twse.com.tw 太快會被暫時封鎖 IP
+    "openapi.twse.com.tw": (5.0, 5),
+}
+
+class TokenBucket:
+    """
+    [令牌桶限速器]
+    每秒補充 rate 個令牌，最多存 capacity 個；拿不到令牌就等
+    多個執行緒共用同一個桶，所以並行時也不會超過證交所的限制
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def set_rate_limit(host, rate, capacity=1):
+    """調整某個網域的速率限制 (例如批次工作想再保守一點)"""
+    with _buckets_lock:
+        RATE_LIMITS[host] = (rate, capacity)
+        _buckets.pop(host, None)
+
+def _bucket_for(hostname):
+    # 找最精確的設定：openapi.twse.com.tw 優先於 twse.com.tw
+    matches = [h for h in RATE_LIMITS if hostname == h or hostname.endswith("." + h)]
+    if not matches:
+        return None
+    host = max(matches, key=len)
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(*RATE_LIMITS[host])
+        return _buckets[host]
+
+# ==========================================
+# 2. 共用連線 (keep-alive 連線池)
+# ==========================================
+class ReplayAdapter(HTTPAdapter):
+    """
+    [重播用的傳輸層]
+    FINDOG_REPLAY=replay 時取代真正的連線，從 fixtures/ 讀回錄好的回應
+    """
+
+    def send(self, request, **kwargs):
+        record = replay.load_response(request.url)
+        if record is None:
+            raise requests.ConnectionError(f"沒有錄製資料: {request.url}", request=request)
+        status, headers, content, encoding = record
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.encoding = encoding
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        return response
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """所有模組共用一個 Session，重複使用 TCP/TLS 連線"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.5,
+                          status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+            if replay.replaying():
+                adapter = ReplayAdapter()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def get(url, **kwargs):
+    """
+    [共用 HTTP 模組]
+    取代各模組直接呼叫 requests.get：先排隊拿令牌，再用共用連線送出
+    """
+    parsed = urlparse(url)
+    with telemetry.span(f"{parsed.hostname}{parsed.path}", kind="fetch") as s:
+        bucket = None if replay.replaying() else _bucket_for(parsed.hostname or "") # 重播時不用排隊
+        if bucket is not None:
+            t = time.perf_counter()
+            bucket.acquire()
+            s.set(wait_ms=round((time.perf_counter() - t) * 1000, 2)) # 花在排隊的時間
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        res = get_session().get(url, **kwargs)
+
+        # urllib3 的 Retry 會把每次重試記在 history
+        retries = getattr(getattr(res.raw, "retries", None), "history", None) or ()
+        s.set(status=res.status_code, bytes=len(res.content), retries=len(retries))
+        if replay.recording() and res.status_code != 304:
+            # 304 沒有內文，存下來會蓋掉同一個網址錄好的 200 回應
+            # 用送出前的網址當 key (含 params)，重播時 ReplayAdapter 收到的就是這個網址
+            replay.save_response(res.history[0].request.url if res.history else res.request.url,
+                                 res.status_code, res.headers, res.content, res.encoding)
+        return res
@@ -0,0 +1,148 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 技術指標參數 (可自行增減，例如 {"ma": (5, 20)} 只算兩條均線)
+# ==========================================
+DEFAULT_PARAMS = {
+    "ma": (5, 10, 20, 60),     # 簡單移動平均
+    "ema": (12, 26),           # 指數移動平均
+    "rsi": (14,),              # RSI (Wilder 平滑)
+    "macd": (12, 26, 9),       # 快線, 慢線, 訊號線
+    "kd": (9, 3, 3),           # RSV 天數, K 平滑, D 平滑 (台股慣用，初始值 50)
+    "bbands": (20, 2.0),       # 布林通道 天數, 標準差倍數
+    "vwma": (20,),             # 成交量加權均線
+    "obv": True,               # 能量潮
+}
+
+# ==========================================
+# 1. 小工具
+# ==========================================
+def _rolling_tail(series, start, window, fn, **kwargs):
+    """
+    只算 start 之後的列：往前多拿 window-1 列當暖身，再用 rolling 整欄計算
+    """
+    base = max(0, start - window + 1)
+    return getattr(series.iloc[base:].rolling(window), fn)(**kwargs).iloc[start - base:]
+
+def _ewm_seeded(values, alpha, seed=None):
+    """
+    指數平滑 y_t = alpha * x_t + (1 - alpha) * y_(t-1)
+    有 seed (上一次的結果) 就接著算，與從頭重算的結果完全相同
+    """
+    if seed is None or pd.isna(seed):
+        return values.ewm(alpha=alpha, adjust=False).mean()
+    seeded = pd.concat([pd.Series([seed]), values], ignore_index=True)
+    out = seeded.ewm(alpha=alpha, adjust=False).mean().iloc[1:]
+    out.index = values.index
+    return out
+
+def _prev(prev, col):
+    return None if prev is None else prev.get(col)
+
+# ==========================================
+# 2. 指標計算 (整欄運算；可從中間接續)
+# ==========================================
+def compute(df, params=None, start=0, prev=None):
+    """
+    [技術指標引擎]
+    df：fetch_stock_history 的股價表 (需依日期由舊到新排序)
+    start / prev：只算 df.iloc[start:]，prev 是上一次結果在 start-1 的那一列 (遞迴型指標的接續值)
+    回傳：與 df.iloc[start:] 同索引的指標表 (底線開頭的欄位是接續計算用的內部狀態)
+    """
+    params = DEFAULT_PARAMS if params is None else params
+    close, high, low = df['收盤價'].astype(float), df['最高價'].astype(float), df['最低價'].astype(float)
+    volume = df['成交股數'].astype(float)
+    new = close.iloc[start:]
+    out = pd.DataFrame(index=new.index)
+
+    for n in params.get("ma", ()):
+        out[f"MA{n}"] = _rolling_tail(close, start, n, 'mean')
+
+    for n in params.get("ema", ()):
+        out[f"EMA{n}"] = _ewm_seeded(new, 2 / (n + 1), _prev(prev, f"EMA{n}"))
+
+    # 前一天收盤價 (算漲跌用)
+    diff = close.iloc[max(0, start - 1):].diff().iloc[1 if start > 0 else 0:]
+
+    for n in params.get("rsi", ()):
+        gain = _ewm_seeded(diff.clip(lower=0), 1 / n, _prev(prev, f"_gain{n}"))
+        loss = _ewm_seeded((-diff).clip(lower=0), 1 / n, _prev(prev, f"_loss{n}"))
+        out[f"_gain{n}"], out[f"_loss{n}"] = gain, loss
+        out[f"RSI{n}"] = (100 * gain / (gain + loss)).where((gain + loss) != 0, 50)
+
+    if params.get("macd"):
+        fast, slow, signal = params["macd"]
+        ema_fast = _ewm_seeded(new, 2 / (fast + 1), _prev(prev, "_macd_fast"))
+        ema_slow = _ewm_seeded(new, 2 / (slow + 1), _prev(prev, "_macd_slow"))
+        dif = ema_fast - ema_slow
+        dea = _ewm_seeded(dif, 2 / (signal + 1), _prev(prev, "MACD"))
+        out["_macd_fast"], out["_macd_slow"] = ema_fast, ema_slow
+        out["DIF"], out["MACD"], out["OSC"] = dif, dea, dif - dea
+
+    if params.get("kd"):
+        n, k_smooth, d_smooth = params["kd"]
+        lowest = _rolling_tail(low, start, n, 'min')
+        highest = _rolling_tail(high, start, n, 'max')
+        rsv = (100 * (new - lowest) / (highest - lowest)).where(highest != lowest, 50).fillna(50)
+        k = _ewm_seeded(rsv, 1 / k_smooth, _prev(prev, "K") if prev is not None else 50)
+        d = _ewm_seeded(k, 1 / d_smooth, _prev(prev, "D") if prev is not None else 50)
+        out["K"], out["D"] = k, d
+
+    if params.get("bbands"):
+        n, width = params["bbands"]
+        mid = _rolling_tail(close, start, n, 'mean')
+        std = _rolling_tail(close, start, n, 'std', ddof=0)
+        out["BB_MID"], out["BB_UP"], out["BB_LOW"] = mid, mid + width * std, mid - width * std
+
+    for n in params.get("vwma", ()):
+        pv = _rolling_tail(close * volume, start, n, 'sum')
+        vol = _rolling_tail(volume, start, n, 'sum')
+        out[f"VWMA{n}"] = (pv / vol).where(vol != 0)
+
+    if params.get("obv"):
+        step = (np.sign(diff) * volume.iloc[start:]).fillna(0)
+        out["OBV"] = step.cumsum() + (_prev(prev, "OBV") or 0)
+
+    return out
+
+def public_columns(result):
+    """去掉內部狀態欄位"""
+    return result[[c for c in result.columns if not c.startswith('_')]]
+
+# ==========================================
+# 3. 每檔股票、每組參數各自快取；新增交易日時只算新的那幾天
+# ==========================================
+_cache = {}
+_lock = threading.Lock()
+
+def _params_key(params):
+    return tuple(sorted((k, v if not isinstance(v, list) else tuple(v)) for k, v in params.items()))
+
+def get_indicators(stock_code, df_price, params=None):
+    """
+    回傳：日期 + 指標欄位 (由舊到新)
+    與上次相比只多了幾天資料時，只接續計算新的日期 (最後一天重算一次，以防當天資料更新)
+    """
+    params = DEFAULT_PARAMS if params is None else params
+    df = df_price.assign(日期=pd.to_datetime(df_price['日期'])).sort_values('日期').reset_index(drop=True)
+    key = (stock_code, _params_key(params))
+
+    with _lock:
+        cached = _cache.get(key)
+
+    start, prev = 0, None
+    if cached is not None and 1 < len(cached) <= len(df) \
+            and cached['日期'].iloc[0] == df['日期'].iloc[0] \
+            and cached['日期'].iloc[-1] == df['日期'].iloc[len(cached) - 1]:
+        start = len(cached) - 1
+        prev = cached.iloc[start - 1]
+
+    block = compute(df, params, start=start, prev=prev)
+    block.insert(0, '日期', df['日期'].iloc[start:])
+    result = block if start == 0 else pd.concat([cached.iloc[:start], block])
+
+    with _lock:
+        _cache[key] = result
+    return public_columns(result).reset_index(drop=True)
@@ -0,0 +1,48 @@
+import concurrent.futures as cf
+
+# ==========================================
+# 並行載入器 (Load Orchestrator)
+# ==========================================
+class LoadOrchestrator:
+    """
+    [並行載入模組]
+    把互相獨立的資料抓取 (基本資料、財報、股價、籌碼、新聞、同業)
+    同時丟進有上限的執行緒池，誰先回來就先交給畫面渲染。
+    某一個來源很慢，也不會卡住其他區塊。
+    """
+
+    def __init__(self, max_workers=8, initializer=None):
+        self.executor = cf.ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
+        self.pending = {} # future -> 任務名稱
+
+    def submit(self, name, fn, *args, **kwargs):
+        """立刻開始一個獨立任務"""
+        future = self.executor.submit(fn, *args, **kwargs)
+        self.pending[future] = name
+        return future
+
+    def as_completed(self):
+        """
+        依完成順序逐一回傳 (任務名稱, 結果)
+        失敗的任務結果為 None，不會中斷其他任務
+        """
+        while self.pending:
+            done, _ = cf.wait(list(self.pending), return_when=cf.FIRST_COMPLETED)
+            for future in done:
+                name = self.pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"   ❌ 載入失敗 [{name}]: {e}")
+                    result = None
+                yield name, result
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
@@ -0,0 +1,21 @@
+import os
+import sqlite3
+
+# ==========================================
+# 本機資料庫位置 (可用環境變數 FINDOG_DATA_DIR 改路徑)
+# ==========================================
+DATA_DIR = os.environ.get(
+    'FINDOG_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+def connect(db_name):
+    """
+    [本機儲存模組]
+    開啟 data/ 底下的 SQLite 資料庫
+    每次呼叫都開新連線，讓多個執行緒可以各自安全地讀寫
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(DATA_DIR, db_name), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL") # 讀寫可以同時進行
+    return conn
@@ -1,5 +1,33 @@
-import feedparser
+import concurrent.futures as cf
+import functools
+import re
+import threading
+import time
 import urllib.parse
+from collections import OrderedDict
+import http_client
+import telemetry
+
+# RSS 快取：同一個查詢網址 FEED_TTL 秒內直接重用；過期後帶 ETag / If-Modified-Since 問一次，沒變就回 304
+FEED_TTL = 300
+FEED_CACHE_SIZE = 256
+
+# === 設定正面關鍵字 ===
+POSITIVE_KEYWORDS = [
+    "營收新高", "獲利創新高", "成長", "表揚", 
+    "得獎", "配息", "殖利率", "優良", "訂單", "擴廠"
+]
+# 排除負面詞 (避免搜到 "獲利衰退" 或 "工安意外賠償")
+POSITIVE_EXCLUDE = ["衰退", "虧損", "弊案", "意外", "裁罰", "重挫"]
+
+# === 設定負面關鍵字 ===
+NEGATIVE_KEYWORDS = [
+    "弊案", "掏空", "工安意外", "判刑", "起訴", 
+    "違約", "假帳", "裁罰", "停工", "汙染", 
+    "求償", "爭議", "重罰", "違規"
+]
+# 排除正面詞 (避免搜到 "工安優良獎")
+NEGATIVE_EXCLUDE = ["表揚", "獲獎", "新高", "成長", "優良", "金質獎"]
 
 def clean_company_name(full_name):
     """
@@ -11,6 +39,180 @@ def clean_company_name(full_name):
     name = name.replace("-KY", "").replace("*", "")
     return name.strip()
 
+# ==========================================
+# 多關鍵字比對器：所有詞彙編成一個 regex，標題只掃一次
+# ==========================================
+def _trie_pattern(terms):
+    """
+    把詞彙建成字典樹再轉成 regex (例如 台積電、台達電 -> 台(?:積電|達電))
+    同一個位置只會往下走一條路，詞彙再多也不用逐一嘗試
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True # 詞尾
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        is_end = '' in node
+        body = branches[0] if len(branches) == 1 and not is_end else '(?:' + '|'.join(branches) + ')'
+        return body + '?' if is_end else body # 貪婪的 ?：能比對到更長的詞就優先
+
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    [多關鍵字比對器]
+    vocabularies：{類別: 詞彙清單}，例如 公司名稱、正面詞、負面詞、排除詞
+    classify(標題) 一次掃描就回傳每個類別出現了哪些詞 (與逐一 `詞 in 標題` 的結果相同)
+    """
+
+    def __init__(self, vocabularies):
+        self.labels = {} # 詞 -> {類別}
+        for label, terms in vocabularies.items():
+            for term in terms:
+                if term:
+                    self.labels.setdefault(term, set()).add(label)
+        # 零寬度的 lookahead：每個位置都比對一次，重疊的詞也找得到 (例如 工安意外 裡的 意外)
+        self.pattern = re.compile('(?=(' + _trie_pattern(self.labels) + '))') if self.labels else None
+        self._contained = {} # 詞 -> 它裡面包含的所有詞 (例如 工安意外 -> {工安意外, 意外})
+
+    def _terms_in(self, term):
+        found = self._contained.get(term)
+        if found is None:
+            found = self._contained[term] = frozenset(t for t in self.labels if t in term)
+        return found
+
+    def find(self, text):
+        """標題中出現的所有詞"""
+        if self.pattern is None:
+            return set()
+        found = set()
+        for longest in {m.group(1) for m in self.pattern.finditer(text)}:
+            found |= self._terms_in(longest)
+        return found
+
+    def classify(self, text):
+        """回傳 {類別: {出現的詞}}，沒有出現的類別不列出"""
+        result = {}
+        for term in self.find(text):
+            for label in self.labels[term]:
+                result.setdefault(label, set()).add(term)
+        return result
+
+@functools.lru_cache(maxsize=128)
+def _matcher(companies, polarity=True):
+    """公司名稱 (+ 多空詞彙) 的比對器；同一組公司只編譯一次"""
+    vocab = {'company': companies}
+    if polarity:
+        vocab.update(positive=POSITIVE_KEYWORDS, negative=NEGATIVE_KEYWORDS,
+                     positive_exclude=POSITIVE_EXCLUDE, negative_exclude=NEGATIVE_EXCLUDE)
+    return KeywordMatcher(vocab)
+
+@functools.lru_cache(maxsize=128)
+def _filter_matcher(target_name, exclude_terms):
+    return KeywordMatcher({'company': [target_name], 'exclude': exclude_terms})
+
+def _entry_record(entry):
+    return {
+        "標題": entry.title,
+        "連結": entry.link,
+        "日期": entry.published if 'published' in entry else '',
+        "來源": entry.source.title if 'source' in entry else 'Google News'
+    }
+
+def filter_entries(entries, target_name, exclude_terms, limit=5):
+    """
+    [標題過濾]
+    標題必須包含公司名稱、且不含排除詞；最多取 limit 則
+    """
+    matcher = _filter_matcher(target_name, tuple(exclude_terms))
+    results = []
+    for entry in entries:
+        hits = matcher.classify(entry.title)
+        # 1. 標題必須包含公司名稱  2. 排除不該出現的詞
+        if 'company' not in hits or 'exclude' in hits:
+            continue
+        results.append(_entry_record(entry))
+        
+        # 兩邊各取前 5 則就好，版面比較好看
+        if len(results) >= limit:
+            break
+    return results
+
+def scan_entries(entries, company_names, limit=5):
+    """
+    [多公司掃描]
+    一份 RSS 同時替很多家公司分出多空：標題含公司名稱 + 正面詞且不含正面排除詞 -> 利多；負面同理
+    回傳：{清洗後的公司名稱: {'positive': [...], 'negative': [...]}}
+    """
+    names = tuple(dict.fromkeys(clean_company_name(n) for n in company_names if n))
+    matcher = _matcher(names)
+    results = {name: {'positive': [], 'negative': []} for name in names}
+    for entry in entries:
+        hits = matcher.classify(entry.title)
+        if 'company' not in hits:
+            continue
+        for polarity in ('positive', 'negative'):
+            if polarity not in hits or f"{polarity}_exclude" in hits:
+                continue
+            for name in hits['company']:
+                if len(results[name][polarity]) < limit:
+                    results[name][polarity].append(_entry_record(entry))
+    return results
+
+_feeds = OrderedDict() # 網址 -> {'at', 'etag', 'modified', 'feed'}
+_feeds_lock = threading.Lock()
+
+def fetch_feed(rss_url):
+    """
+    [RSS 下載]
+    透過 http_client 抓 RSS (共用連線、計時、錄製 / 重播)，再交給 feedparser 解析 bytes
+    快取內且未過期：不發請求；過期：條件式請求，304 時沿用上次解析好的結果
+    """
+    with _feeds_lock:
+        cached = _feeds.get(rss_url)
+    if cached is not None and time.monotonic() - cached['at'] < FEED_TTL:
+        telemetry.annotate(cache='hit')
+        return cached['feed']
+
+    headers = {}
+    if cached is not None:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['modified']:
+            headers['If-Modified-Since'] = cached['modified']
+
+    res = http_client.get(rss_url, headers=headers)
+    if res.status_code == 304 and cached is None:
+        # 沒有快取可沿用卻收到 304 (例如舊的錄製資料)：當成未命中，要求完整內容再抓一次
+        res = http_client.get(rss_url, headers={'Cache-Control': 'no-cache'})
+        if res.status_code == 304:
+            raise ConnectionError(f"RSS 回傳 304 但本機沒有快取: {rss_url}")
+    etag, modified = res.headers.get('ETag'), res.headers.get('Last-Modified')
+    if res.status_code == 304 and cached is not None:
+        telemetry.annotate(cache='hit', revalidated=True)
+        feed = cached['feed']
+        # 304 不一定會再帶一次驗證標頭，沒帶就沿用上次的
+        etag, modified = etag or cached['etag'], modified or cached['modified']
+    else:
+        res.raise_for_status()
+        telemetry.annotate(cache='miss')
+        import feedparser # 用到才載入
+        feed = feedparser.parse(res.content)
+
+    with _feeds_lock:
+        _feeds[rss_url] = {'at': time.monotonic(), 'etag': etag, 'modified': modified, 'feed': feed}
+        _feeds.move_to_end(rss_url)
+        while len(_feeds) > FEED_CACHE_SIZE:
+            _feeds.popitem(last=False)
+    return feed
+
+@telemetry.timed("新聞搜尋")
 def search_news(company_name, news_type='negative'):
     """
     [新聞搜尋 V8.0 - 雙向雷達版]
@@ -22,24 +224,11 @@ def search_news(company_name, news_type='negative'):
     target_name = clean_company_name(company_name)
     
     if news_type == 'positive':
-        # === 設定正面關鍵字 ===
-        keywords = [
-            "營收新高", "獲利創新高", "成長", "表揚", 
-            "得獎", "配息", "殖利率", "優良", "訂單", "擴廠"
-        ]
-        # 排除負面詞 (避免搜到 "獲利衰退" 或 "工安意外賠償")
-        exclude_terms = ["衰退", "虧損", "弊案", "意外", "裁罰", "重挫"]
+        keywords, exclude_terms = POSITIVE_KEYWORDS, POSITIVE_EXCLUDE
         print(f"🕵️‍♀️ 正在挖掘 {target_name} 的【好消息】...")
         
     else:
-        # === 設定負面關鍵字 ===
-        keywords = [
-            "弊案", "掏空", "工安意外", "判刑", "起訴", 
-            "違約", "假帳", "裁罰", "停工", "汙染", 
-            "求償", "爭議", "重罰", "違規"
-        ]
-        # 排除正面詞 (避免搜到 "工安優良獎")
-        exclude_terms = ["表揚", "獲獎", "新高", "成長", "優良", "金質獎"]
+        keywords, exclude_terms = NEGATIVE_KEYWORDS, NEGATIVE_EXCLUDE
         print(f"🕵️‍♀️ 正在掃描 {target_name} 的【壞消息】...")
 
     # 組合查詢
@@ -50,46 +239,21 @@ def search_news(company_name, news_type='negative'):
     # Google News RSS
     rss_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
     
-    results = []
-    
     try:
-        feed = feedparser.parse(rss_url)
-        
-        for entry in feed.entries:
-            title = entry.title
-            link = entry.link
-            date_pub = entry.published if 'published' in entry else ''
-            
-            # --- 嚴格過濾邏輯 ---
-            
-            # 1. 標題必須包含公司名稱
-            if target_name not in title:
-                continue
-            
-            # 2. 排除不該出現的詞
-            is_excluded = False
-            for bad_word in exclude_terms:
-                if bad_word in title:
-                    is_excluded = True
-                    break
-            
-            if is_excluded:
-                continue
-
-            # 3. 加入結果
-            results.append({
-                "標題": title,
-                "連結": link,
-                "日期": date_pub,
-                "來源": entry.source.title if 'source' in entry else 'Google News'
-            })
-            
-            # 兩邊各取前 5 則就好，版面比較好看
-            if len(results) >= 5:
-                break
+        feed = fetch_feed(rss_url)
+        results = filter_entries(feed.entries, target_name, exclude_terms)
 
     except Exception as e:
         print(f"   ❌ 搜尋錯誤: {e}")
         return []
 
-    return results
\ No newline at end of file
+    return results
+
+def search_news_all(company_name, news_types=('positive', 'negative')):
+    """
+    多空兩個查詢同時發出 (約一次來回的時間)
+    回傳：{news_type: 新聞清單}
+    """
+    with cf.ThreadPoolExecutor(max_workers=len(news_types)) as pool:
+        futures = {t: pool.submit(telemetry.bind(search_news), company_name, t) for t in news_types}
+    return {t: f.result() for t, f in futures.items()}
@@ -0,0 +1,163 @@
+import pandas as pd
+import http_client
+import local_store
+import snapshot_loader
+import telemetry
+import trading_calendar
+
+DB_NAME = "price_history.sqlite"
+
+# STOCK_DAY 的欄位 (與 stock_history_2330.csv 相同)
+STOCK_DAY_COLUMNS = ['日期', '成交股數', '成交金額', '開盤價', '最高價', '最低價', '收盤價', '漲跌價差', '成交筆數', '註記']
+NUMERIC_COLUMNS = ['成交股數', '成交金額', '開盤價', '最高價', '最低價', '收盤價', '漲跌價差', '成交筆數']
+
+# ==========================================
+# 1. 資料表
+# ==========================================
+def _connect():
+    conn = local_store.connect(DB_NAME)
+    cols = ", ".join(f'"{c}" REAL' for c in NUMERIC_COLUMNS)
+    conn.execute(f'CREATE TABLE IF NOT EXISTS stock_day (code TEXT, "日期" TEXT, {cols}, "註記" TEXT, PRIMARY KEY (code, "日期"))')
+    # 記錄每個 (股票, 月份) 抓過沒有；closed=1 代表該月已結束，以後不用再抓
+    conn.execute("CREATE TABLE IF NOT EXISTS stock_month (code TEXT, month TEXT, closed INTEGER, fetched_at TEXT, PRIMARY KEY (code, month))")
+    return conn
+
+def _month_key(month_start):
+    return month_start.strftime("%Y%m")
+
+def _is_closed(month_start):
+    """這個月份已經完全過去 (下個月 1 號 <= 今天)，資料不會再變"""
+    return month_start + pd.offsets.MonthBegin(1) <= pd.Timestamp.now().normalize()
+
+# ==========================================
+# 2. 解析證交所 STOCK_DAY
+# ==========================================
+def parse_stock_day(data):
+    """
+    把 STOCK_DAY JSON 轉成 DataFrame
+    民國日期 (113/02/01) 轉成西元 (2024-02-01)，數字去掉千分位
+    """
+    df = pd.DataFrame(data['data'], columns=data['fields'])
+    # 月、日固定是 "/MM/DD" 六個字，前面剩下的就是民國年 (切字串比 split 快很多)
+    roc = df['日期']
+    df['日期'] = (roc.str[:-6].astype(int) + 1911).astype(str) + roc.str[-6:].str.replace('/', '-', regex=False)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            values = df[col].astype(str).str.replace(',', '', regex=False)
+            if col == '漲跌價差': # 只有漲跌欄會出現 "X0.00" (除權息等無比價)
+                values = values.str.replace('X', '', regex=False)
+            df[col] = pd.to_numeric(values, errors='coerce')
+    return df.reindex(columns=STOCK_DAY_COLUMNS)
+
+def fetch_month(stock_code, month_start):
+    """
+    從證交所抓某支股票某個月的日成交資訊
+    回傳：DataFrame (沒有資料時為空表)；連線失敗回傳 None
+    """
+    date_str = month_start.strftime("%Y%m%d")
+    url = f"https://www.twse.com.tw/exchangeReport/STOCK_DAY?response=json&date={date_str}&stockNo={stock_code}"
+    try:
+        res = http_client.get(url, verify=False)
+        data = res.json()
+        if data['stat'] == 'OK':
+            df = parse_stock_day(data)
+            trading_calendar.learn_trading_dates(df['日期']) # 有成交的日期一定是交易日
+            return df
+        return pd.DataFrame(columns=STOCK_DAY_COLUMNS) # 該月沒有交易資料 (例如尚未上市)
+    except Exception as e:
+        print(f"   ❌ {stock_code} {date_str[:6]} 股價抓取失敗: {e}")
+        return None
+
+# ==========================================
+# 3. 寫入 / 讀取
+# ==========================================
+def save_month(stock_code, month_start, df):
+    """把一個月的資料寫進本機 (同一天重複寫入會覆蓋)"""
+    month = _month_key(month_start)
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute('DELETE FROM stock_day WHERE code = ? AND substr("日期", 1, 7) = ?',
+                         (stock_code, f"{month[:4]}-{month[4:]}"))
+            if not df.empty:
+                rows = df.reindex(columns=STOCK_DAY_COLUMNS)
+                rows = rows.astype(object).where(rows.notna(), None)
+                rows.insert(0, 'code', stock_code)
+                marks = ", ".join("?" * rows.shape[1])
+                conn.executemany(f"INSERT INTO stock_day VALUES ({marks})", rows.values.tolist())
+            conn.execute("INSERT OR REPLACE INTO stock_month VALUES (?, ?, ?, ?)",
+                         (stock_code, month, int(_is_closed(month_start)), pd.Timestamp.now().isoformat()))
+    finally:
+        conn.close()
+
+def stored_months(stock_code):
+    """回傳 {月份: 是否已結束}"""
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT month, closed FROM stock_month WHERE code = ?", (stock_code,)).fetchall()
+    finally:
+        conn.close()
+    return {month: bool(closed) for month, closed in rows}
+
+def missing_months(stock_code, month_list):
+    """month_list 中還需要下載的月份 (沒抓過，或當時還沒結束)"""
+    have = stored_months(stock_code)
+    return [m for m in month_list if not have.get(_month_key(m))]
+
+def load_history(stock_code, start=None, end=None):
+    """從本機讀出股價歷史 (日期為 YYYY-MM-DD 字串，由舊到新)"""
+    sql = 'SELECT * FROM stock_day WHERE code = ?'
+    params = [stock_code]
+    if start is not None:
+        sql += ' AND "日期" >= ?'
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        sql += ' AND "日期" <= ?'
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    sql += ' ORDER BY "日期"'
+    conn = _connect()
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return df.drop(columns=['code'])
+
+# ==========================================
+# 4. 主功能：只補抓缺少的月份
+# ==========================================
+@telemetry.timed("股價歷史")
+def get_history(stock_code, months=6, start=None, end=None):
+    """
+    [股價歷史庫]
+    已結束的月份存在本機永久保留，只有「本月」與「還沒抓過的月份」才上網抓
+    months：抓最近 N 個月；也可以直接給 start / end 延伸到好幾年
+    """
+    end_ts = pd.Timestamp(end) if end is not None else pd.Timestamp.now()
+    if start is None:
+        start = end_ts.replace(day=1) - pd.DateOffset(months=months - 1)
+    # 只抓有交易日的月份 (例如月初連假時，本月還沒有任何資料就不問)
+    month_list = trading_calendar.trading_months(start, end_ts)
+
+    # 離線模式只讀本機 (先用 snapshot_loader --import-prices 匯入)
+    pending = [] if snapshot_loader.OFFLINE else missing_months(stock_code, month_list)
+    telemetry.annotate(months=len(month_list), fetched=len(pending), cache='miss' if pending else 'hit')
+    for month_start in pending: # 已結束且存過的月份不再下載
+        df = fetch_month(stock_code, month_start) # 速率由 http_client 統一控制
+        if df is not None:
+            save_month(stock_code, month_start, df)
+
+    if not month_list:
+        return None
+    df_all = load_history(stock_code, start=month_list[0], end=end_ts)
+    return df_all if not df_all.empty else None
+
+# ==========================================
+# 5. 匯入手動保存的 CSV (例如 stock_history_2330.csv)
+# ==========================================
+def import_csv(stock_code, path):
+    """把以前手動下載的股價 CSV 匯入本機庫，已結束的月份之後就不用再抓"""
+    df = snapshot_loader.load(path, kind="stock_day") # 千分位、正負號、空白註記都在這裡一次處理
+    months = pd.to_datetime(df['日期']).dt.to_period('M')
+    for period, df_month in df.groupby(months):
+        save_month(stock_code, period.to_timestamp(), df_month)
+    print(f"📥 已匯入 {stock_code} 共 {len(df)} 筆股價 ({months.nunique()} 個月)")
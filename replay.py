@@ -0,0 +1,122 @@
+"""
+[錄製 / 重播]
+把對外連線 (證交所 API、Yahoo 財報、翻譯、Google News) 的回應錄成檔案，之後不連網也能重播
+效能量測因此可以重現，版本之間的計時也能互相比較
+
+    FINDOG_REPLAY=record python -m streamlit run app.py    # 照常上網，同時把回應存進 fixtures/
+    FINDOG_REPLAY=replay python -m streamlit run app.py    # 完全不上網，只讀 fixtures/
+    FINDOG_REPLAY_LATENCY=0.2                               # 重播時每個回應固定延遲幾秒 (模擬網路)
+    FINDOG_FIXTURES=fixtures/2024Q1                         # fixture 資料夾
+
+重播時找不到錄製資料就當作連線失敗，各模組原本的錯誤處理會接手
+建議重播時用 FINDOG_DATA_DIR 指到一個空資料夾，本機快取才不會影響計時
+"""
+import base64
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+MODE = os.environ.get("FINDOG_REPLAY", "off") # off / record / replay
+FIXTURE_DIR = os.environ.get("FINDOG_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+LATENCY = float(os.environ.get("FINDOG_REPLAY_LATENCY", "0"))
+
+_lock = threading.Lock()
+
+class ReplayMiss(ConnectionError):
+    """重播模式下找不到錄製資料"""
+
+def configure(mode=None, fixture_dir=None, latency=None):
+    """在程式內切換模式 (例如效能測試腳本)"""
+    global MODE, FIXTURE_DIR, LATENCY
+    if mode is not None:
+        MODE = mode
+    if fixture_dir is not None:
+        FIXTURE_DIR = fixture_dir
+    if latency is not None:
+        LATENCY = latency
+
+def recording():
+    return MODE == "record"
+
+def replaying():
+    return MODE == "replay"
+
+# ==========================================
+# 1. 檔案位置 (同一個 key 一定對到同一個檔案)
+# ==========================================
+def fixture_path(kind, key, ext):
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(FIXTURE_DIR, kind, digest + ext)
+
+def _write(kind, key, path, data):
+    """先寫暫存檔再改名；index.jsonl 記下 key 方便人工查找"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'wb') as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    with _lock, open(os.path.join(FIXTURE_DIR, kind, "index.jsonl"), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"file": os.path.basename(path), "key": repr(key)}, ensure_ascii=False) + "\n")
+
+def _delay():
+    if LATENCY > 0:
+        time.sleep(LATENCY)
+
+# ==========================================
+# 2. 一般函式呼叫 (yfinance、翻譯、RSS)：結果以 pickle 保存
+# ==========================================
+def call(kind, key, fn):
+    """
+    [錄製 / 重播包裝]
+    off：直接呼叫 fn；record：呼叫後存檔；replay：不呼叫 fn，讀回存檔
+    """
+    if MODE not in ("record", "replay"):
+        return fn()
+
+    path = fixture_path(kind, key, ".pkl")
+    if MODE == "replay":
+        if not os.path.exists(path):
+            raise ReplayMiss(f"{kind} 沒有錄製資料: {key}")
+        _delay()
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    value = fn()
+    _write(kind, key, path, pickle.dumps(value))
+    return value
+
+# ==========================================
+# 3. HTTP 回應 (給 http_client 用)：JSON 檔，內文可直接閱讀
+# ==========================================
+# 內文已經解壓縮，這些標頭重播時不能沿用
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+def save_response(url, status, headers, content, encoding=None):
+    try:
+        body, body_format = content.decode('utf-8'), "text"
+    except UnicodeDecodeError:
+        body, body_format = base64.b64encode(content).decode('ascii'), "base64"
+    record = {
+        "url": url,
+        "status": status,
+        "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+        "encoding": encoding,
+        "format": body_format,
+        "body": body,
+    }
+    _write("http", url, fixture_path("http", url, ".json"),
+           json.dumps(record, ensure_ascii=False, indent=1).encode('utf-8'))
+
+def load_response(url):
+    """回傳 (status, headers, content, encoding)；沒有錄製資料回傳 None"""
+    path = fixture_path("http", url, ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        record = json.load(f)
+    body = record["body"]
+    content = base64.b64decode(body) if record["format"] == "base64" else body.encode('utf-8')
+    _delay()
+    return record["status"], record["headers"], content, record.get("encoding")
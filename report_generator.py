@@ -0,0 +1,165 @@
+import hashlib
+import io
+import json
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import telemetry
+
+# ==========================================
+# 1. 產出結果快取 (Streamlit 每次重跑都會呼叫，輸入沒變就直接回傳)
+# ==========================================
+CACHE_SIZE = 32
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _hash_frame(df):
+    if df is None:
+        return "none"
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df)
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns], ensure_ascii=False).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+def report_key(stock_id, info, df_price, df_ratios, df_chips, score_data):
+    """用所有輸入內容算出一個雜湊值，當作快取 key"""
+    h = hashlib.sha256()
+    h.update(str(stock_id).encode('utf-8'))
+    h.update(json.dumps(info or {}, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+    h.update(json.dumps(score_data or {}, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+    for df in (df_price, df_ratios, df_chips):
+        h.update(_hash_frame(df).encode('utf-8'))
+    return h.hexdigest()
+
+# ==========================================
+# 2. 串流寫入 (constant_memory：一列寫完就釋放，不建立整張表的儲存格物件)
+# ==========================================
+def _cell_values(df):
+    """把 DataFrame 轉成可以直接 write_row 的資料 (日期轉字串、缺值轉空白)"""
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%d')
+    out = out.astype(object).where(out.notna(), None)
+    return out
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+def _summary_value(value):
+    """摘要欄位：NaN / 無限大 (例如 Yahoo 缺科目時的 Z-Score) 顯示 N/A，Excel 不接受這種數字"""
+    if value is None or (_is_number(value) and not math.isfinite(value)):
+        return 'N/A'
+    return value
+
+def _write_frame(ws, df, start_row, header_fmt, num_fmt):
+    """從 start_row 開始寫出表頭與資料；回傳下一個空白列"""
+    ws.write_row(start_row, 0, [str(c) for c in df.columns], header_fmt)
+    row = start_row + 1
+    for values in _cell_values(df).itertuples(index=False, name=None):
+        for col, value in enumerate(values):
+            if value is None or (_is_number(value) and not math.isfinite(value)):
+                continue
+            if _is_number(value):
+                ws.write_number(row, col, float(value), num_fmt)
+            else:
+                ws.write_string(row, col, str(value))
+        row += 1
+    return row
+
+def build_workbook(stock_id, info, df_price, df_ratios, df_chips, score_data):
+    """實際產生 Excel (bytes)"""
+    info = info or {}
+    import xlsxwriter # 真的要產生報告才載入
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {'constant_memory': True})
+    title_fmt = wb.add_format({'bold': True, 'font_size': 16})
+    header_fmt = wb.add_format({'bold': True, 'bg_color': '#DDEBF7', 'border': 1})
+    label_fmt = wb.add_format({'bold': True})
+    num_fmt = wb.add_format({'num_format': '#,##0.##'})
+
+    # --- 工作表 1：徵信摘要 ---
+    ws = wb.add_worksheet("徵信摘要")
+    ws.set_column(0, 0, 18)
+    ws.set_column(1, 4, 16)
+    ws.write_string(0, 0, f"{stock_id} {info.get('公司名稱', '')} 企業徵信報告", title_fmt)
+    ws.write_string(1, 0, "產出時間", label_fmt)
+    ws.write_string(1, 1, pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'))
+    row = 3
+    if score_data:
+        for label, key in [("綜合信用評分", '總分'), ("評級", '評級'), ("Z-Score", 'Z-Score'), ("Z-Score 狀態", 'Z-Status')]:
+            ws.write_string(row, 0, label, label_fmt)
+            ws.write(row, 1, _summary_value(score_data.get(key)))
+            row += 1
+        row += 1
+        ws.write_string(row, 0, "五力評分明細", label_fmt)
+        row = _write_frame(ws, pd.DataFrame(score_data.get('細項', [])), row + 1, header_fmt, num_fmt)
+    else:
+        ws.write_string(row, 0, "資料不足，無法產生徵信評分。")
+
+    # --- 工作表 2：基本資料 ---
+    ws = wb.add_worksheet("基本資料")
+    ws.set_column(0, 0, 14)
+    ws.set_column(1, 1, 80)
+    for i, (key, value) in enumerate(info.items()):
+        ws.write_string(i, 0, str(key), label_fmt)
+        ws.write_string(i, 1, str(value))
+
+    # --- 工作表 3~5：財務比率、股價、籌碼 ---
+    for sheet_name, df in [("財務比率", df_ratios), ("股價歷史", df_price), ("法人籌碼", df_chips)]:
+        ws = wb.add_worksheet(sheet_name)
+        if df is None or df.empty:
+            ws.write_string(0, 0, "無資料")
+            continue
+        ws.set_column(0, len(df.columns) - 1, 14)
+        ws.freeze_panes(1, 0)
+        _write_frame(ws, df, 0, header_fmt, num_fmt)
+
+    wb.close()
+    return output.getvalue()
+
+# ==========================================
+# 3. 主功能
+# ==========================================
+@telemetry.timed("Excel 報告")
+def generate_excel_report(stock_id, info, df_price, df_ratios, df_chips, score_data):
+    """
+    [報告產生模組]
+    產生徵信報告 Excel，回傳 bytes (給 st.download_button 使用)
+    以串流模式寫入，多年股價也不會吃光記憶體；相同輸入直接回傳快取結果
+    """
+    key = report_key(stock_id, info, df_price, df_ratios, df_chips, score_data)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            telemetry.annotate(cache='hit')
+            return _cache[key]
+
+    telemetry.annotate(cache='miss')
+    data = build_workbook(stock_id, info, df_price, df_ratios, df_chips, score_data)
+
+    with _cache_lock:
+        _cache[key] = data
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
+
+def generate_summary_report(df_summary, title="批次徵信報告總表"):
+    """把多家公司的評分結果寫成一張總表 (批次匯出用)，回傳 bytes"""
+    import xlsxwriter
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {'constant_memory': True})
+    title_fmt = wb.add_format({'bold': True, 'font_size': 16})
+    header_fmt = wb.add_format({'bold': True, 'bg_color': '#DDEBF7', 'border': 1})
+    num_fmt = wb.add_format({'num_format': '#,##0.##'})
+
+    ws = wb.add_worksheet("總表")
+    ws.set_column(0, max(len(df_summary.columns) - 1, 0), 16)
+    ws.write_string(0, 0, f"{title} ({pd.Timestamp.now():%Y-%m-%d})", title_fmt)
+    _write_frame(ws, df_summary, 2, header_fmt, num_fmt)
+    wb.close()
+    return output.getvalue()
@@ -0,0 +1,192 @@
+"""
+[本機快照載入]
+讀取證交所下載的 CSV (例如 market_fundamentals_20240205.csv、stock_history_2330.csv)
+這些檔案有 BOM、引號內的千分位 ("74,076,141,634")、帶正負號的漲跌 (" 0.00", "+7.00", "X0.00") 與空白的註記欄
+
+第一次讀取時以明確的欄位型別一次解析，另存成欄式快照 (有 pyarrow 用 Feather，可 memory map；沒有就用 pickle)
+之後只要 CSV 沒有更新，都直接讀快照，不再解析 CSV
+
+使用方式：
+    python snapshot_loader.py                   # 轉換專案資料夾內所有 CSV 快照
+    python snapshot_loader.py --import-prices   # 順便把股價 CSV 匯入本機股價庫
+    FINDOG_OFFLINE=1 python -m streamlit run app.py   # 分析模組改讀本機快照，不連網
+"""
+import argparse
+import glob
+import os
+import re
+import threading
+import pandas as pd
+import local_store
+
+SOURCE_DIR = os.environ.get("FINDOG_SNAPSHOT_SOURCE", os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(local_store.DATA_DIR, "snapshots")
+
+# 離線模式：有本機快照的資料就不上網
+OFFLINE = os.environ.get("FINDOG_OFFLINE") == "1"
+
+# ==========================================
+# 1. 欄位型別 (一次解析，不再逐欄 str.replace)
+# ==========================================
+SCHEMAS = {
+    # 個股日成交資訊 (STOCK_DAY 匯出)
+    "stock_day": {
+        "float": ['成交股數', '成交金額', '開盤價', '最高價', '最低價', '收盤價', '成交筆數'],
+        "signed": ['漲跌價差'],
+        "text": ['日期', '註記'],
+    },
+    # 全市場本益比 / 殖利率 / 股價淨值比 (BWIBBU 匯出)
+    "market_fundamentals": {
+        "float": ['收盤價', '殖利率(%)', '本益比', '股價淨值比'],
+        "signed": [],
+        "text": ['證券代號', '證券名稱', '股利年度', '財報年/季'],
+    },
+}
+
+def detect_kind(path):
+    """看表頭判斷是哪一種檔案"""
+    with open(path, encoding='utf-8-sig') as f:
+        header = f.readline()
+    if '成交股數' in header:
+        return "stock_day"
+    if '證券代號' in header:
+        return "market_fundamentals"
+    raise ValueError(f"無法辨識的 CSV 格式: {os.path.basename(path)}")
+
+def read_twse_csv(path, kind=None):
+    """
+    [CSV 解析]
+    千分位由 read_csv 的 thousands 直接處理；只有帶正負號 / X 的漲跌欄另外轉數字
+    "-"、"--" 與空白視為缺值，文字欄的缺值補成空字串
+    """
+    schema = SCHEMAS[kind or detect_kind(path)]
+    dtype = {c: 'float64' for c in schema['float']}
+    dtype.update({c: str for c in schema['text'] + schema['signed']})
+    df = pd.read_csv(path, encoding='utf-8-sig', thousands=',', dtype=dtype,
+                     na_values=['-', '--', ''], keep_default_na=False)
+    for col in schema['signed']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].str.strip().str.lstrip('X'), errors='coerce')
+    for col in schema['text']:
+        if col in df.columns:
+            df[col] = df[col].fillna('')
+    return df
+
+# ==========================================
+# 2. 欄式快照 (Feather / pickle)
+# ==========================================
+def _feather():
+    try:
+        import pyarrow.feather as feather # 選用套件
+        return feather
+    except ImportError:
+        return None
+
+def snapshot_path(csv_path):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(SNAPSHOT_DIR, name + (".feather" if _feather() else ".pkl"))
+
+def convert(csv_path, kind=None):
+    """CSV 轉成欄式快照，回傳快照路徑"""
+    df = read_twse_csv(csv_path, kind)
+    path = snapshot_path(csv_path)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    feather = _feather()
+    tmp = path + ".tmp"
+    if feather:
+        feather.write_feather(df, tmp, compression='uncompressed') # 不壓縮才能 memory map
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+    return path
+
+_loaded = {}
+_lock = threading.Lock()
+
+def load(csv_path, kind=None):
+    """
+    [快照讀取]
+    快照比 CSV 新就直接讀快照，否則先重新轉換；同一個快照在程式內只讀一次
+    """
+    path = snapshot_path(csv_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(csv_path):
+        convert(csv_path, kind)
+    key = (path, os.path.getmtime(path))
+    with _lock:
+        if key in _loaded:
+            return _loaded[key]
+
+    feather = _feather()
+    if feather:
+        df = feather.read_table(path, memory_map=True).to_pandas()
+    else:
+        df = pd.read_pickle(path)
+    with _lock:
+        _loaded[key] = df
+    return df
+
+def load_series(pattern):
+    """
+    讀取同一種檔案的多個日期 (例如一整年的 market_fundamentals_*.csv)，疊成一張表
+    檔名裡的 8 碼日期放在「快照日期」欄
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(SOURCE_DIR, pattern))):
+        match = re.search(r'(\d{8})', os.path.basename(path))
+        df = load(path)
+        frames.append(df.assign(快照日期=pd.Timestamp(match.group(1)) if match else pd.NaT))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def latest(pattern):
+    """SOURCE_DIR 中符合 pattern 的最新一份 CSV (依檔名排序)，沒有就回傳 None"""
+    paths = sorted(glob.glob(os.path.join(SOURCE_DIR, pattern)))
+    return paths[-1] if paths else None
+
+# ==========================================
+# 3. 給分析模組用的本機資料
+# ==========================================
+def market_stats():
+    """
+    最新一份全市場本益比快照，欄位與 competitor_analysis.get_market_stats 相同
+    快照日期記在 df.attrs['snapshot_date'] (畫面上要標示資料不是即時的)；沒有快照時回傳空表
+    """
+    path = latest("market_fundamentals_*.csv")
+    if path is None:
+        return pd.DataFrame()
+    df = load(path)[['證券代號', '本益比', '殖利率(%)', '股價淨值比']].copy()
+    df = df.fillna({'本益比': 0, '殖利率(%)': 0, '股價淨值比': 0}) # 與線上版相同："-" 視為 0
+    match = re.search(r'(\d{8})', os.path.basename(path))
+    df.attrs['snapshot_date'] = f"{pd.Timestamp(match.group(1)):%Y-%m-%d}" if match else os.path.basename(path)
+    return df
+
+def price_files():
+    """回傳 [(代號, 路徑)]：stock_history_2330.csv、stock_price_2330_202402.csv 這類股價檔"""
+    result = []
+    for path in sorted(glob.glob(os.path.join(SOURCE_DIR, "stock_*.csv"))):
+        match = re.match(r'stock_(?:history|price)_(\w+?)(?:_\d{6})?\.csv$', os.path.basename(path))
+        if match:
+            result.append((match.group(1), path))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV 轉欄式快照")
+    parser.add_argument('paths', nargs='*', help="CSV 檔案 (不給就轉換專案資料夾內全部)")
+    parser.add_argument('--import-prices', action='store_true', help="把股價 CSV 匯入本機股價庫 (price_store)")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(SOURCE_DIR, "*.csv")))
+    for path in paths:
+        try:
+            kind = detect_kind(path)
+        except ValueError:
+            continue # 休市表等其他 CSV
+        out = convert(path, kind)
+        print(f"📦 {os.path.basename(path)} → {out}")
+
+    if args.import_prices:
+        import price_store
+        for code, path in price_files():
+            price_store.import_csv(code, path)
+
+if __name__ == "__main__":
+    main()
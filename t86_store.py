@@ -0,0 +1,149 @@
+import json
+import pandas as pd
+import http_client
+import local_store
+import trading_calendar
+
+DB_NAME = "t86.sqlite"
+
+# 當天還沒公布資料時，多久之後再重試 (分鐘)
+TODAY_RETRY_MINUTES = 30
+
+# ==========================================
+# 1. 資料表
+# ==========================================
+def _connect():
+    conn = local_store.connect(DB_NAME)
+    # 每個交易日的全市場三大法人買賣超 (一天約一千多筆)
+    conn.execute("""CREATE TABLE IF NOT EXISTS t86 (
+        date TEXT, code TEXT, name TEXT,
+        外資 INTEGER, 投信 INTEGER, 自營商 INTEGER, 合計 INTEGER,
+        raw TEXT, PRIMARY KEY (date, code))""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_t86_code ON t86 (code, date)")
+    # 記錄哪些日期抓過；trading=0 代表休市 (沒有資料)
+    conn.execute("CREATE TABLE IF NOT EXISTS t86_day (date TEXT PRIMARY KEY, trading INTEGER, fetched_at TEXT)")
+    return conn
+
+# ==========================================
+# 2. 解析證交所 T86
+# ==========================================
+def parse_t86(data):
+    """把 T86 JSON 轉成整張表 (保留原始欄位在 raw)"""
+    df = pd.DataFrame(data['data'], columns=data['fields'])
+
+    def to_int(col):
+        return pd.to_numeric(df[col].str.replace(',', ''), errors='coerce').fillna(0).astype('int64')
+
+    return pd.DataFrame({
+        'code': df['證券代號'].str.strip(),
+        'name': df['證券名稱'].str.strip(),
+        '外資': to_int('外資自營商買賣超股數'),
+        '投信': to_int('投信買賣超股數'),
+        '自營商': to_int('自營商買賣超股數'),
+        '合計': to_int('三大法人買賣超股數'),
+        'raw': [json.dumps(dict(zip(data['fields'], row)), ensure_ascii=False) for row in data['data']],
+    })
+
+def fetch_day(date_obj):
+    """
+    從證交所抓某一天的全市場 T86
+    回傳：DataFrame；休市回傳空表；連線失敗回傳 None
+    """
+    date_str = date_obj.strftime("%Y%m%d")
+    url = f"https://www.twse.com.tw/rwd/zh/fund/T86?date={date_str}&selectType=ALL&response=json"
+    try:
+        res = http_client.get(url) # 速率由 http_client 統一控制
+        data = res.json()
+        if data['stat'] == 'OK':
+            return parse_t86(data)
+        return pd.DataFrame()
+    except Exception as e:
+        print(f"   ❌ T86 {date_str} 抓取失敗: {e}")
+        return None
+
+# ==========================================
+# 3. 確保某一天已在本機
+# ==========================================
+def _known_day(conn, date_key):
+    """回傳 True (有資料) / False (休市) / None (沒抓過或需要重抓)"""
+    row = conn.execute("SELECT trading, fetched_at FROM t86_day WHERE date = ?", (date_key,)).fetchone()
+    if row is None:
+        return None
+    trading, fetched_at = row
+    if trading:
+        return True
+    # 當天抓的「沒資料」可能只是還沒公布 (盤中查詢)，不能當成休市：
+    # 還是同一天就隔一段時間再試，日期過了之後第一次查詢一定重抓
+    fetched_at = pd.Timestamp(fetched_at)
+    if fetched_at.strftime("%Y-%m-%d") <= date_key:
+        if pd.Timestamp.now() - fetched_at > pd.Timedelta(minutes=TODAY_RETRY_MINUTES) \
+                or pd.Timestamp.now().strftime("%Y-%m-%d") > date_key:
+            return None
+    return False
+
+def save_day(date_obj, df):
+    """把一天的全市場 T86 寫進本機 (df 為空代表休市)"""
+    date_key = date_obj.strftime("%Y-%m-%d")
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("DELETE FROM t86 WHERE date = ?", (date_key,))
+            if not df.empty:
+                rows = df.copy()
+                rows.insert(0, 'date', date_key)
+                conn.executemany("INSERT INTO t86 VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows.values.tolist())
+            conn.execute("INSERT OR REPLACE INTO t86_day VALUES (?, ?, ?)",
+                         (date_key, int(not df.empty), pd.Timestamp.now().isoformat()))
+    finally:
+        conn.close()
+
+def ensure_day(date_obj):
+    """
+    [T86 全市場快照]
+    每個交易日只下載一次整張表，之後所有股票都從本機查
+    回傳：True 有資料 / False 休市 / None 抓取失敗
+    """
+    date_key = date_obj.strftime("%Y-%m-%d")
+    conn = _connect()
+    try:
+        known = _known_day(conn, date_key)
+        if known is not None:
+            return known
+        if not trading_calendar.is_trading_day(date_obj): # 週末、國定假日不用問
+            return False
+    finally:
+        conn.close()
+
+    df = fetch_day(date_obj)
+    if df is None:
+        return None
+
+    # 讓交易日曆學起來：有資料就是開市；過去的日期沒資料就是休市
+    if not df.empty or date_key < pd.Timestamp.now().strftime("%Y-%m-%d"):
+        trading_calendar.learn(date_obj, not df.empty)
+    save_day(date_obj, df)
+    return not df.empty
+
+def load_rows(codes, dates):
+    """
+    從本機查出指定股票、指定日期的三大法人買賣超
+    股票很多時 (例如整份觀察名單) 改成整天讀出後一次用 isin 篩選
+    """
+    codes = list(codes)
+    date_keys = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in dates]
+    if not codes or not date_keys:
+        return pd.DataFrame(columns=['date', 'code', '外資', '投信', '自營商', '合計'])
+
+    sql = f"SELECT date, code, 外資, 投信, 自營商, 合計 FROM t86 WHERE date IN ({', '.join('?' * len(date_keys))})"
+    params = date_keys
+    by_index = len(codes) <= 500 # 少量股票直接走 code 索引
+    if by_index:
+        sql += f" AND code IN ({', '.join('?' * len(codes))})"
+        params = date_keys + codes
+
+    conn = _connect()
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return df if by_index else df[df['code'].isin(codes)].reset_index(drop=True)
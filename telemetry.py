@@ -0,0 +1,209 @@
+"""
+[效能追蹤]
+每一次對外抓取 (證交所、Yahoo、翻譯、Google News) 與每個分析階段都包成一個 span，
+記錄 耗時、資料大小、重試次數、快取命中與錯誤
+
+- 結構化 JSON log：logger "findog.telemetry" (DEBUG 等級)；
+  設定 FINDOG_TELEMETRY_LOG=路徑 時另外寫成 JSON Lines 檔
+- app.py 側邊欄的除錯面板：依使用者 session 彙總，看出時間花在哪裡
+
+用法：
+    with telemetry.span("www.twse.com.tw/exchangeReport/STOCK_DAY", kind="fetch") as s:
+        ...
+        s.set(bytes=len(res.content), retries=1)
+
+    @telemetry.timed("財報分析")
+    def get_comprehensive_analysis(...): ...
+"""
+import collections
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("findog.telemetry")
+LOG_FILE = os.environ.get("FINDOG_TELEMETRY_LOG")
+MAX_SPANS = 2000 # 每個 session 最多保留幾筆
+MAX_SESSIONS = 50 # 最多保留幾個 session (最久沒動的先丟)
+
+# 這幾個欄位有固定意義，其他的都放進 attrs
+FIELDS = ("bytes", "retries", "cache", "status", "error")
+
+_lock = threading.Lock()
+_spans = collections.OrderedDict() # session -> deque[dict]，最近有紀錄的排最後
+_local = threading.local()
+_session_resolver = lambda: None
+
+def set_session_resolver(fn):
+    """
+    告訴 telemetry 目前是哪個使用者 session (app.py 用 Streamlit 的 session_id)
+    批次工作不用設定，全部記在 None 底下
+    """
+    global _session_resolver
+    _session_resolver = fn
+
+def _session():
+    if hasattr(_local, "session"): # bind() 帶進來的
+        return _local.session
+    try:
+        return _session_resolver()
+    except Exception:
+        return None
+
+def bind(fn):
+    """把目前的 session 帶進執行緒池裡的工作 (例如同時送出的多個查詢)，紀錄才會算在同一個人身上"""
+    session = _session()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _local.session = session
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            del _local.session
+    return wrapper
+
+# ==========================================
+# 1. Span
+# ==========================================
+class Span:
+    def __init__(self, name, kind, attrs):
+        self.name = name
+        self.kind = kind
+        self.started_at = time.time()
+        self.duration_ms = None
+        self.bytes = None
+        self.retries = 0
+        self.cache = None # 'hit' / 'miss' / 'stale'
+        self.status = None
+        self.error = None
+        self.attrs = {}
+        self.set(**attrs)
+
+    def set(self, **kwargs):
+        for key, value in kwargs.items():
+            if key in FIELDS:
+                setattr(self, key, value)
+            else:
+                self.attrs[key] = value
+
+    def to_dict(self):
+        record = {
+            "name": self.name,
+            "kind": self.kind,
+            "started_at": round(self.started_at, 3),
+            "duration_ms": self.duration_ms,
+            "thread": threading.current_thread().name,
+        }
+        record.update({f: getattr(self, f) for f in FIELDS})
+        record.update(self.attrs)
+        return record
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+@contextlib.contextmanager
+def span(name, kind="stage", **attrs):
+    """
+    [計時區塊]
+    kind：fetch (對外連線) / stage (分析階段) / load (網頁載入)
+    區塊內丟出的例外會記錄在 error 後照常往外丟
+    """
+    s = Span(name, kind, attrs)
+    stack = _stack()
+    stack.append(s)
+    t = time.perf_counter()
+    try:
+        yield s
+    except Exception as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.duration_ms = round((time.perf_counter() - t) * 1000, 2)
+        stack.pop()
+        _emit(s)
+
+def annotate(**kwargs):
+    """替目前最內層的 span 補上資訊 (例如快取命中)；不在任何 span 內就忽略"""
+    stack = _stack()
+    if stack:
+        stack[-1].set(**kwargs)
+
+def timed(name, kind="stage"):
+    """把整個函式包成一個 span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ==========================================
+# 2. 輸出 (記憶體 + JSON log)
+# ==========================================
+def _json(record):
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+def to_json_lines(spans):
+    """轉成 JSON Lines 字串 (一個 span 一行)"""
+    return "".join(_json(r) + "\n" for r in spans)
+
+def _emit(s):
+    record = s.to_dict()
+    session = _session()
+    line = _json(record)
+    with _lock:
+        if session in _spans:
+            _spans.move_to_end(session)
+        else:
+            _spans[session] = collections.deque(maxlen=MAX_SPANS)
+            while len(_spans) > MAX_SESSIONS:
+                _spans.popitem(last=False)
+        _spans[session].append(record)
+        if LOG_FILE:
+            with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+    logger.debug(line)
+
+def session_spans(session=None):
+    """某個 session 的所有 span (由舊到新)"""
+    with _lock:
+        return list(_spans.get(session, ()))
+
+def clear(session=None):
+    with _lock:
+        _spans.pop(session, None)
+
+def summarize(spans):
+    """
+    依 (kind, name) 彙總：次數、總耗時、平均、最大、資料量、重試、快取命中、錯誤
+    回傳 DataFrame，依總耗時由大到小
+    """
+    import pandas as pd
+    if not spans:
+        return pd.DataFrame()
+    df = pd.DataFrame(spans)
+    for col in FIELDS:
+        if col not in df.columns:
+            df[col] = None
+    df['命中'] = df['cache'] == 'hit'
+    df['未命中'] = df['cache'].isin(['miss', 'stale'])
+    df['錯誤'] = df['error'].notna()
+    summary = df.groupby(['kind', 'name']).agg(
+        次數=('duration_ms', 'size'),
+        總耗時_ms=('duration_ms', 'sum'),
+        平均_ms=('duration_ms', 'mean'),
+        最大_ms=('duration_ms', 'max'),
+        資料量_KB=('bytes', lambda s: pd.to_numeric(s, errors='coerce').sum() / 1024),
+        重試=('retries', lambda s: pd.to_numeric(s, errors='coerce').sum()),
+        命中=('命中', 'sum'),
+        未命中=('未命中', 'sum'),
+        錯誤=('錯誤', 'sum'),
+    ).reset_index()
+    return summary.sort_values('總耗時_ms', ascending=False).round(1).reset_index(drop=True)
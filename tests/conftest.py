@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 專案模組都放在根目錄 (沒有套件結構)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
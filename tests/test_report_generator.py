@@ -0,0 +1,30 @@
+import io
+import math
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("xlsxwriter")
+
+import report_generator as rg
+
+
+def _score_data(z_score):
+    return {
+        "總分": 60, "評級": "B (普通)", "Z-Score": z_score, "Z-Status": "破產高險 (Distress)",
+        "細項": [{"項目": "獲利能力", "數值": float("nan"), "評語": "資料不足", "得分": 0}],
+    }
+
+
+@pytest.mark.parametrize("z_score", [float("nan"), math.inf])
+def test_report_with_non_finite_z_score(z_score):
+    """Yahoo 缺科目時 Z-Score 是 NaN，報告要照常產生並顯示 N/A"""
+    df_ratios = pd.DataFrame({"期間": ["2023"], "Z-Score": [z_score], "ROE (%)": [12.5]})
+    data = rg.build_workbook("2330", {"公司名稱": "台積電"}, None, df_ratios, None, _score_data(z_score))
+
+    wb = openpyxl.load_workbook(io.BytesIO(data))
+    summary = {row[0]: row[1] for row in wb["徵信摘要"].iter_rows(values_only=True) if row[0]}
+    assert summary["Z-Score"] == "N/A"
+    assert summary["綜合信用評分"] == 60
+    assert wb["財務比率"]["B2"].value is None
+    assert wb["財務比率"]["C2"].value == 12.5
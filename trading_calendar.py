@@ -0,0 +1,123 @@
+import csv
+import os
+import threading
+import pandas as pd
+import local_store
+
+DB_NAME = "calendar.sqlite"
+HOLIDAY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "twse_holidays.csv")
+
+# ==========================================
+# 1. 休市表 (本機檔案) + 從回應學到的交易日
+# ==========================================
+_holidays = None
+_learned = None
+_lock = threading.Lock()
+
+def _connect():
+    conn = local_store.connect(DB_NAME)
+    conn.execute("CREATE TABLE IF NOT EXISTS trading_day (date TEXT PRIMARY KEY, trading INTEGER)")
+    return conn
+
+def _load():
+    """第一次使用時讀入休市表與已學到的日期"""
+    global _holidays, _learned
+    with _lock:
+        if _holidays is None:
+            holidays = set()
+            if os.path.exists(HOLIDAY_FILE):
+                with open(HOLIDAY_FILE, encoding='utf-8-sig') as f:
+                    holidays = {row['日期'] for row in csv.DictReader(f)}
+            conn = _connect()
+            try:
+                learned = dict(conn.execute("SELECT date, trading FROM trading_day").fetchall())
+            finally:
+                conn.close()
+            _holidays, _learned = holidays, {d: bool(t) for d, t in learned.items()}
+            _check_coverage(holidays)
+
+def _check_coverage(holidays):
+    """休市表沒涵蓋今年時提醒更新 (否則國定假日都要白白送一次請求才學得到)"""
+    this_year = str(pd.Timestamp.now().year)
+    if not any(d.startswith(this_year) for d in holidays):
+        last = max(holidays)[:4] if holidays else "無"
+        print(f"⚠️ 休市表 (twse_holidays.csv) 只到 {last} 年，沒有 {this_year} 年的資料，請依證交所公告更新")
+
+def learn(date_obj, trading):
+    """
+    記下某天實際有沒有開市
+    來源：T86 有資料 = 開市；過去日期的 T86 沒資料 = 休市；STOCK_DAY 出現的日期 = 開市
+    """
+    _load()
+    date_key = pd.Timestamp(date_obj).strftime("%Y-%m-%d")
+    with _lock:
+        if _learned.get(date_key) == bool(trading):
+            return
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO trading_day VALUES (?, ?)", (date_key, int(trading)))
+    finally:
+        conn.close()
+    with _lock:
+        _learned[date_key] = bool(trading)
+
+def learn_trading_dates(dates):
+    """一次記下多個確定有開市的日期 (例如某個月 STOCK_DAY 的所有日期)"""
+    _load()
+    keys = {pd.Timestamp(d).strftime("%Y-%m-%d") for d in dates}
+    with _lock: # 股價回補、網頁載入的多個執行緒會同時呼叫
+        new_keys = {d for d in keys if not _learned.get(d)}
+    if not new_keys:
+        return
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO trading_day VALUES (?, 1)", [(d,) for d in new_keys])
+    finally:
+        conn.close()
+    with _lock:
+        for d in new_keys:
+            _learned[d] = True
+
+# ==========================================
+# 2. 查詢
+# ==========================================
+def is_trading_day(date_obj):
+    """
+    [交易日曆]
+    優先使用實際學到的結果，其次查休市表，最後以週一到週五推定
+    """
+    _load()
+    date_key = pd.Timestamp(date_obj).strftime("%Y-%m-%d")
+    with _lock:
+        learned = _learned.get(date_key)
+    if learned is not None:
+        return learned
+    if pd.Timestamp(date_obj).weekday() >= 5:
+        return False
+    return date_key not in _holidays
+
+def trading_days(start, end):
+    """start ~ end (含) 之間的交易日，由舊到新"""
+    days = pd.date_range(start=pd.Timestamp(start).normalize(), end=pd.Timestamp(end).normalize(), freq='D')
+    return [d for d in days if is_trading_day(d)]
+
+def iter_trading_days_back(end=None, max_days=3650):
+    """從 end (預設今天) 往回一天一天列出交易日"""
+    day = pd.Timestamp(end if end is not None else pd.Timestamp.now()).normalize()
+    for _ in range(max_days):
+        if is_trading_day(day):
+            yield day
+        day -= pd.Timedelta(days=1)
+
+def trading_months(start, end):
+    """start ~ end 之間「至少有一個交易日」的月份 (回傳每月 1 號)"""
+    end_ts = min(pd.Timestamp(end), pd.Timestamp.now()).normalize()
+    months = pd.date_range(start=pd.Timestamp(start).replace(day=1).normalize(), end=end_ts, freq='MS')
+    result = []
+    for month_start in months:
+        month_end = min(month_start + pd.offsets.MonthEnd(0), end_ts)
+        if trading_days(month_start, month_end):
+            result.append(month_start)
+    return result
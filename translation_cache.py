@@ -0,0 +1,109 @@
+"""
+[翻譯快取]
+公司簡介的翻譯以「原文內容 + 目標語言」的雜湊值為 key 存在本機
+英文原文沒變就不會再呼叫 GoogleTranslator
+
+預先翻譯全市場 (讓使用者第一次打開就很快)：
+    python translation_cache.py
+    python translation_cache.py --codes 2330 2317 --workers 4
+"""
+import argparse
+import concurrent.futures as cf
+import hashlib
+import os
+import pandas as pd
+import local_store
+import replay
+import telemetry
+
+DB_NAME = "translations.sqlite"
+MAX_CHARS = 4000 # GoogleTranslator 單次上限
+
+def _connect():
+    conn = local_store.connect(DB_NAME)
+    conn.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, target TEXT, translated TEXT, created_at TEXT)")
+    return conn
+
+def text_key(text, target):
+    """內容雜湊：同一段原文、同一個目標語言一定得到同一個 key"""
+    return hashlib.sha256(f"{target}\n{text}".encode('utf-8')).hexdigest()
+
+def lookup(text, target='zh-TW'):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT translated FROM translations WHERE key = ?", (text_key(text, target),)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+def translate(text, target='zh-TW'):
+    """
+    先查快取，沒有才真的翻譯並存起來
+    翻譯失敗會丟出例外，由呼叫端決定要不要顯示原文
+    """
+    text = text[:MAX_CHARS] # 限制字數翻譯
+    with telemetry.span("translate", kind="fetch", bytes=len(text.encode('utf-8'))) as s:
+        cached = lookup(text, target)
+        if cached is not None:
+            s.set(cache='hit')
+            return cached
+
+        def call_translator():
+            from deep_translator import GoogleTranslator # 快取沒命中才載入
+            return GoogleTranslator(source='auto', target=target).translate(text)
+
+        s.set(cache='miss')
+        translated = replay.call("translate", (target, text), call_translator)
+    if translated:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                             (text_key(text, target), target, translated, pd.Timestamp.now().isoformat()))
+        finally:
+            conn.close()
+    return translated
+
+# ==========================================
+# 批次預先翻譯
+# ==========================================
+def pretranslate_company(stock_code, target='zh-TW'):
+    """抓一家公司的英文簡介並翻譯；回傳 'cached' / 'translated' / 'skipped'"""
+    import yfinance as yf
+    import fundamentals_cache
+
+    symbol = f"{stock_code}.TW"
+    info = fundamentals_cache.get(symbol, "info", lambda: yf.Ticker(symbol).info)
+    summary = (info or {}).get('longBusinessSummary', '')
+    if len(summary) <= 10:
+        return 'skipped'
+    if lookup(summary[:MAX_CHARS], target) is not None:
+        return 'cached'
+    translate(summary, target)
+    return 'translated'
+
+def main():
+    default_universe = os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_fundamentals_20240205.csv")
+    parser = argparse.ArgumentParser(description="預先翻譯全市場公司簡介")
+    parser.add_argument('--codes', nargs='*', help="股票代號 (不給就用全市場清單)")
+    parser.add_argument('--universe', default=default_universe, help="全市場清單 CSV")
+    parser.add_argument('--workers', type=int, default=4, help="同時翻譯的數量")
+    args = parser.parse_args()
+
+    codes = args.codes or pd.read_csv(args.universe, encoding='utf-8-sig', dtype=str)['證券代號'].tolist()
+    print(f"🌐 預先翻譯 {len(codes)} 家公司簡介 (並行 {args.workers})...")
+
+    counts = {'cached': 0, 'translated': 0, 'skipped': 0, 'failed': 0}
+    with cf.ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(pretranslate_company, code): code for code in codes}
+        for future in cf.as_completed(futures):
+            try:
+                counts[future.result()] += 1
+            except Exception as e:
+                counts['failed'] += 1
+                print(f"   ❌ {futures[future]} 翻譯失敗: {e}")
+
+    print(f"✅ 完成：新翻譯 {counts['translated']}、已在快取 {counts['cached']}、無簡介 {counts['skipped']}、失敗 {counts['failed']}")
+
+if __name__ == "__main__":
+    main()